@@ -2,10 +2,15 @@
 
 """
 
+import warnings
+import numpy as np
 import torch
 import torch.nn as nn
 import torch.nn.functional as F
 
+# Inference caches, rebuilt lazily and never pickled with the model.
+_CACHE_ATTRIBUTES = ('_input_buffer', '_input_array', '_compiled_forward')
+
 
 class AI(nn.Module):
 
@@ -17,7 +22,7 @@ class AI(nn.Module):
         self.fc3 = nn.Linear(32, out_features)
         self.to(self.device)
 
-    def forward(self, x: torch.tensor):
+    def forward(self, x: torch.Tensor):
         x = x.to(self.device)
         x = F.relu(self.fc1(x))
         x = F.relu(self.fc2(x))
@@ -25,10 +30,60 @@ class AI(nn.Module):
 
         return x
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for attribute in _CACHE_ATTRIBUTES:
+            state.pop(attribute, None)
+
+        return state
+
+    def _get_forward(self):
+        return self.__dict__.get('_compiled_forward') or self.forward
+
     def predict(self, x):
-        x = torch.tensor(x)
-        x_orig_device = x.device
-        x = self.forward(x)
-        x.to(x_orig_device)
+        """
+        Action (index of the maximal output) for a single state, copied into a preallocated
+        input buffer and evaluated without autograd.
+        """
+        if '_input_buffer' not in self.__dict__:
+            self.__dict__['_input_buffer'] = torch.empty(self.fc1.in_features)
+            self.__dict__['_input_array'] = self.__dict__['_input_buffer'].numpy()
+
+        self._input_array[:] = x
+        with torch.inference_mode():
+            x = self._get_forward()(self._input_buffer)
 
         return int(torch.argmax(x))
+
+    def predict_batch(self, x: np.ndarray):
+        """
+        Actions for a batch of states, an array of shape (batch, in_features).
+        """
+        x = torch.from_numpy(np.ascontiguousarray(x, dtype=np.float32))
+        with torch.inference_mode():
+            x = self._get_forward()(x)
+
+        return torch.argmax(x, dim=1).cpu().numpy()
+
+    def compile_forward(self, mode: str = 'script'):
+        """
+        Use an optimized forward for `predict` and `predict_batch`: the forward compiled to
+        TorchScript ('script'), a TorchScript trace of it on an example batch ('trace', checked
+        against the forward) or `torch.compile` ('compile'). The model weights are shared, so
+        the optimized forward follows training updates.
+        """
+        if mode == 'script':
+            compiled_forward = torch.jit.script(self)
+        elif mode == 'trace':
+            example = torch.zeros(1, self.fc1.in_features, device=self.device)
+            # The forward has no data-dependent branches, so the trace holds for any input.
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', torch.jit.TracerWarning)
+                compiled_forward = torch.jit.trace(self, example)
+        elif mode == 'compile':
+            compiled_forward = torch.compile(self.forward)
+        else:
+            raise ValueError(f"Unknown compile mode: {mode}")
+
+        # Bypass nn.Module attribute registration, so it is not a sub-module of this model.
+        self.__dict__['_compiled_forward'] = compiled_forward
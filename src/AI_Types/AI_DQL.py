@@ -2,16 +2,16 @@
 
 """
 
-import time
-import random
-from collections import namedtuple, deque
 import torch
 import torch.nn as nn
 import numpy as np
-import matplotlib.pyplot as plt
-import pandas as pd
 from games.ball_game.ball_game import BallGame
+from games.ball_game.vector_ball_game import VectorBallGame
 from AI_Types.AI import AI
+from AI_Types.replay_buffer import ReplayBuffer, PrioritizedReplayBuffer
+from AI_Types.checkpoint import AsyncCheckpointer, load_snapshot, get_rng_states, set_rng_states
+from instrumentation import timer, flush
+from metrics import MetricsLog, plot_curve
 
 
 GAME_NAME = 'q-learn'
@@ -20,30 +20,54 @@ MEMORY_SIZE = 100_000       # size of memory buffer
 NUM_STEPS_FOR_UPDATE = 4    # perform a learning update every C time steps
 SAMPLE_SIZE = 128           # Size of sample
 TAU = 0.99                  # Update Q target function softly
-Experience = namedtuple('Experience', ['state', 'action', 'reward', 'next_state'])
-
-
-class Memory(deque):
-    def get_sample(self):
-        sample_device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        experiences = random.sample(self, SAMPLE_SIZE)
-        sample = list(map(lambda var: torch.tensor(var, device=sample_device), zip(*experiences)))
-
-        return sample
 
 
 def train_qnet(screen_size, num_episodes=300, lr=1e-3, gamma=0.995,
-               epsilon=0.98, eps_end=0.005, eps_decay=0.96, print_learning_curve=True):
-    mem_buff = Memory(maxlen=MEMORY_SIZE)
+               epsilon=0.98, eps_end=0.005, eps_decay=0.96, print_learning_curve=True,
+               prioritized=False, target_update_every: int | None = None,
+               checkpoint_path: str | None = None, checkpoint_every: int = 10,
+               metrics_path: str | None = None):
+    """
+    Train a Q-network on the ball game.
+
+    :param print_learning_curve: Plot the average points of the episodes once training is
+            over (blocks until the plot is closed).
+
+    :param target_update_every: Copy the Q-network into the target network every this many
+            learning steps. When None, the target network is softly updated on every step.
+    :param checkpoint_path: Where to snapshot the training every `checkpoint_every` episodes
+            (from a background thread). When the file exists, training resumes from it.
+    :param checkpoint_every: Number of episodes between snapshots.
+    :param metrics_path: Metrics log receiving a record per episode, see `metrics`.
+
+    When `instrumentation` is enabled, its phases are flushed at the end of every episode.
+    """
     game = BallGame(screen_size)
     q_net_target = AI(game.STATE_FEATURES, game.NUM_ACTIONS)
     q_net = AI(game.STATE_FEATURES, game.NUM_ACTIONS)
+    hard_update_target(q_net_target, q_net)
+    if prioritized:
+        mem_buff = PrioritizedReplayBuffer(MEMORY_SIZE, game.STATE_FEATURES, device=q_net.device)
+    else:
+        mem_buff = ReplayBuffer(MEMORY_SIZE, game.STATE_FEATURES, device=q_net.device)
     average_point_history = []
 
-    criterion = nn.SmoothL1Loss()
+    criterion = nn.SmoothL1Loss(reduction='none')
     optimizer = torch.optim.Adam(q_net.parameters(), lr=lr)
-
-    for episode in range(num_episodes):
+    tau = None if target_update_every else TAU
+    num_updates = 0
+    start_episode = 0
+
+    checkpointer = None
+    if checkpoint_path:
+        snapshot = load_snapshot(checkpoint_path)
+        if snapshot is not None:
+            mem_buff, progress = restore_snapshot(snapshot, q_net_target, q_net, optimizer)
+            start_episode, epsilon, num_updates, average_point_history = progress
+        checkpointer = AsyncCheckpointer(checkpoint_path, checkpoint_every)
+    metrics = MetricsLog(metrics_path, rolling=('average_points',)) if metrics_path else None
+
+    for episode in range(start_episode, num_episodes):
         total_points = 0.
         num_timesteps = 0
 
@@ -51,11 +75,15 @@ def train_qnet(screen_size, num_episodes=300, lr=1e-3, gamma=0.995,
                         show_game=False)
         while True:
             state, action, reward, next_state, is_done = perform_time_step(q_net, game, epsilon)
-            experience = Experience(state, action, reward, next_state)
-            mem_buff.append(experience)
+            with timer('replay.append'):
+                mem_buff.append(state, action, reward, next_state, is_done)
 
             if is_need_update(mem_buff, num_timesteps):
-                learning_step(q_net_target, q_net, mem_buff, gamma, criterion, optimizer)
+                learning_step(q_net_target, q_net, mem_buff, gamma, criterion, optimizer, tau)
+                num_updates += 1
+                if target_update_every and num_updates % target_update_every == 0:
+                    with timer('learner.target_update'):
+                        hard_update_target(q_net_target, q_net)
 
             total_points += reward
             num_timesteps += 1
@@ -65,23 +93,156 @@ def train_qnet(screen_size, num_episodes=300, lr=1e-3, gamma=0.995,
 
             # Episode finished
             if is_done or total_points > ENOUGH_POINTS:
-                time.sleep(0.2)
                 break
 
         epsilon = get_new_eps(epsilon, eps_decay, eps_end)
         average_point_history.append(total_points/num_timesteps)
         print()
+        flush(loop='train_qnet', episode=episode + 1, timesteps=num_timesteps,
+              updates=num_updates)
+        if metrics:
+            metrics.log(episode + 1, average_points=average_point_history[-1],
+                        total_points=total_points, timesteps=num_timesteps, epsilon=epsilon)
+        if checkpointer and checkpointer.is_due(episode + 1):
+            checkpointer.save(make_snapshot(
+                q_net_target, q_net, optimizer, mem_buff,
+                (episode + 1, epsilon, num_updates, average_point_history)))
         if total_points > ENOUGH_POINTS:
             print(f"Learning terminated! Successfully learned the game in {episode+1} episodes!")
             break
 
-    plot_learning_curve(average_point_history)
+    if checkpointer:
+        checkpointer.close()
+    if metrics:
+        metrics.close()
+    if print_learning_curve:
+        plot_learning_curve(average_point_history)
     game.kill()
 
+    return q_net
+
+
+def train_qnet_batched(screen_size, num_envs=64, num_episodes=300, lr=1e-3, gamma=0.995,
+                       epsilon=0.98, eps_end=0.005, eps_decay=0.96, prioritized=False,
+                       target_update_every: int | None = None, seed: int | None = None,
+                       print_learning_curve=True, metrics_path: str | None = None):
+    """
+    Train a Q-network on `num_envs` ball games played side by side. Every tick selects the
+    actions of all the games with one batched forward pass, pushes their transitions into
+    the replay buffer and performs a single learning step. Epsilon decays once per finished
+    episode, like in `train_qnet`.
+
+    :param target_update_every: Copy the Q-network into the target network every this many
+            learning steps. When None, the target network is softly updated on every step.
+    :param print_learning_curve: Plot the average points of the episodes once training is
+            over (blocks until the plot is closed).
+    :param metrics_path: Metrics log receiving a record per finished episode, see `metrics`.
+
+    When `instrumentation` is enabled, its phases are flushed every 500 ticks.
+    """
+    env = VectorBallGame(num_envs, screen_size, game_speed=2., seed=seed)
+    rng = np.random.default_rng(seed)
+    q_net_target = AI(env.STATE_FEATURES, env.NUM_ACTIONS)
+    q_net = AI(env.STATE_FEATURES, env.NUM_ACTIONS)
+    hard_update_target(q_net_target, q_net)
+    if prioritized:
+        mem_buff = PrioritizedReplayBuffer(MEMORY_SIZE, env.STATE_FEATURES, device=q_net.device,
+                                           seed=seed)
+    else:
+        mem_buff = ReplayBuffer(MEMORY_SIZE, env.STATE_FEATURES, device=q_net.device, seed=seed)
+    average_point_history = []
+
+    criterion = nn.SmoothL1Loss(reduction='none')
+    optimizer = torch.optim.Adam(q_net.parameters(), lr=lr)
+    tau = None if target_update_every else TAU
+
+    metrics = MetricsLog(metrics_path, rolling=('average_points',)) if metrics_path else None
+
+    total_points = np.zeros(num_envs)
+    num_timesteps = np.zeros(num_envs, dtype=np.int64)
+    num_ticks = 0
+    num_updates = 0
+    states = env.reset()
+    while len(average_point_history) < num_episodes:
+        with timer('policy.act'):
+            actions = choose_actions(states, env.NUM_ACTIONS, q_net, epsilon, rng)
+        with timer('env.step'):
+            next_states, rewards, dones = env.step(actions)
+        with timer('replay.append'):
+            mem_buff.extend(states, actions, rewards, next_states, dones)
+        states = next_states
+
+        if len(mem_buff) > SAMPLE_SIZE:
+            learning_step(q_net_target, q_net, mem_buff, gamma, criterion, optimizer, tau)
+            num_updates += 1
+            if target_update_every and num_updates % target_update_every == 0:
+                with timer('learner.target_update'):
+                    hard_update_target(q_net_target, q_net)
+
+        total_points += rewards
+        num_timesteps += 1
+        num_ticks += 1
+
+        if num_ticks % 500 == 0:
+            print(f"\r[Episodes: {len(average_point_history)}] Time step: {num_ticks}", end='')
+            flush(loop='train_qnet_batched', ticks=num_ticks, updates=num_updates,
+                  episodes=len(average_point_history))
+
+        if total_points.max() > ENOUGH_POINTS:
+            print(f"\nLearning terminated! Successfully learned the game in "
+                  f"{len(average_point_history) + 1} episodes!")
+            break
+
+        # Episodes finished (the games were already reset by the environment)
+        if dones.any():
+            first_episode = len(average_point_history) + 1
+            average_point_history.extend((total_points[dones] / num_timesteps[dones]).tolist())
+            for episode, env_index in enumerate(np.flatnonzero(dones), first_episode):
+                epsilon = get_new_eps(epsilon, eps_decay, eps_end)
+                if metrics:
+                    metrics.log(episode, average_points=average_point_history[episode - 1],
+                                total_points=float(total_points[env_index]),
+                                timesteps=int(num_timesteps[env_index]), epsilon=epsilon)
+            total_points[dones] = 0.
+            num_timesteps[dones] = 0
+
+    print()
+    if metrics:
+        metrics.close()
+    if print_learning_curve:
+        plot_learning_curve(average_point_history)
+
+    return q_net
+
+
+def make_snapshot(q_net_target: AI, q_net: AI, optimizer, mem_buff: ReplayBuffer, progress):
+    """
+    :return: The training state, to save with an `AsyncCheckpointer` (which copies it).
+    """
+    return {'q_net_target': q_net_target.state_dict(), 'q_net': q_net.state_dict(),
+            'optimizer': optimizer.state_dict(), 'mem_buff': mem_buff, 'progress': progress,
+            'rng': get_rng_states()}
+
+
+def restore_snapshot(snapshot: dict, q_net_target: AI, q_net: AI, optimizer):
+    """
+    Load a snapshot made by `make_snapshot` into the networks, the optimizer and the random
+    generators.
+
+    :return: The replay buffer and the training progress of the snapshot.
+    """
+    q_net_target.load_state_dict(snapshot['q_net_target'])
+    q_net.load_state_dict(snapshot['q_net'])
+    optimizer.load_state_dict(snapshot['optimizer'])
+    set_rng_states(snapshot['rng'])
+
+    return snapshot['mem_buff'], snapshot['progress']
+
 
 def perform_time_step(q_net: AI, game: BallGame, epsilon: float):
     state = game.get_state(GAME_NAME)
-    action = choose_action(state, game.NUM_ACTIONS, q_net, epsilon)
+    with timer('policy.act'):
+        action = choose_action(state, game.NUM_ACTIONS, q_net, epsilon)
     game.make_action(GAME_NAME, action)
     reward = game.get_reward(GAME_NAME, action)
     next_state = game.get_state(GAME_NAME)
@@ -99,76 +260,82 @@ def choose_action(state, num_actions: int, q_net: AI, epsilon: float):
     return action
 
 
+def choose_actions(states: np.ndarray, num_actions: int, q_net: AI, epsilon: float,
+                   rng: np.random.Generator):
+    # A single forward pass for all the states, then random actions where exploring
+    actions = q_net.predict_batch(states)
+
+    explore = rng.random(len(states)) < epsilon
+    actions[explore] = rng.integers(0, num_actions, int(explore.sum()))
+
+    return actions
+
+
 def get_new_eps(epsilon: float, eps_decay=0.995, eps_end=0.01):
     return max(epsilon * eps_decay, eps_end)
 
 
-def is_need_update(mem_buff: Memory, iteration: int):
+def is_need_update(mem_buff: ReplayBuffer, iteration: int):
     return len(mem_buff) > SAMPLE_SIZE and iteration % NUM_STEPS_FOR_UPDATE == 0
 
 
-def learning_step(q_net_target, q_net, mem_buff, gamma, criterion, optimizer):
-    sample = mem_buff.get_sample()
-    y_targets = evaluate_targets(q_net_target, sample, gamma)
-    y_predicts = evaluate_predicts(q_net, sample)
+def learning_step(q_net_target, q_net, mem_buff, gamma, criterion, optimizer, tau=TAU,
+                  sample_size=SAMPLE_SIZE):
+    with timer('replay.sample'):
+        sample = mem_buff.sample(sample_size)
+    with timer('learner.forward'):
+        y_targets = evaluate_targets(q_net_target, sample, gamma)
+        y_predicts = evaluate_predicts(q_net, sample)
+        losses = criterion(y_predicts, y_targets)
 
-    # backward + optimize
-    optimizer.zero_grad()
-    loss = criterion(y_predicts, y_targets)
-    loss.backward()
-    optimizer.step()
+    # backward + optimize (criterion is element-wise, weighted by the importance weights)
+    with timer('learner.backward'):
+        optimizer.zero_grad()
+        loss = losses.mean() if sample.weights is None else (losses * sample.weights).mean()
+        loss.backward()
+        optimizer.step()
 
-    soft_update_target(q_net_target, q_net)
+    if sample.weights is not None:
+        with timer('replay.update_priorities'):
+            mem_buff.update_priorities(sample.indices,
+                                       (y_predicts - y_targets).detach().cpu().numpy())
+
+    if tau is not None:
+        with timer('learner.target_update'):
+            soft_update_target(q_net_target, q_net, tau)
 
 
 def evaluate_targets(q_net_target: AI, sample, gamma=0.995):
-    _, _, rewards, next_states = sample
+    rewards, next_states, dones = sample.rewards, sample.next_states, sample.dones
 
     with torch.no_grad():
         max_qsa, _ = torch.max(q_net_target(next_states), dim=1)
 
-    y_targets = rewards + (next_states != 'lose') * gamma * max_qsa
+        # y = r + γ (1 - done) max Q'(s', a'), terminal transitions get no bootstrap term.
+        y_targets = torch.addcmul(rewards, 1 - dones, max_qsa, value=gamma)
 
     return y_targets
 
 
 def evaluate_predicts(q_net: AI, sample):
-    states, actions, _, _ = sample
-    y_predicts = q_net(states)[torch.arange(SAMPLE_SIZE), actions]
+    states, actions = sample.states, sample.actions
+    y_predicts = q_net(states).gather(1, actions.unsqueeze(1)).squeeze(1)
     return y_predicts
 
 
-def soft_update_target(q_net_target: AI, q_net: AI):
-    # Soft update of the target network's weights
-    # θ′ ← τ θ + (1 −τ )θ′
-    q_net_target_dict = q_net_target.state_dict()
-    q_net_dict = q_net.state_dict()
+def soft_update_target(q_net_target: AI, q_net: AI, tau: float = TAU):
+    # Soft update of the target network's weights, in place with a single fused op
+    # θ′ ← τ θ′ + (1 −τ )θ
+    with torch.no_grad():
+        torch._foreach_lerp_(list(q_net_target.parameters()), list(q_net.parameters()), 1 - tau)
 
-    for key in q_net_target_dict:
-        q_net_target_dict[key] = q_net_target_dict[key] * TAU + (1-TAU) * q_net_dict[key]
 
-    q_net_target.load_state_dict(q_net_target_dict)
+def hard_update_target(q_net_target: AI, q_net: AI):
+    # θ′ ← θ
+    with torch.no_grad():
+        torch._foreach_copy_(list(q_net_target.parameters()), list(q_net.parameters()))
 
 
 def plot_learning_curve(average_point_history, rolling_window=5):
-    rh = average_point_history
-    xs = np.arange(len(average_point_history))
-    df = pd.DataFrame(rh)
-    rolling_mean = df.rolling(rolling_window).mean()
-
-    plt.figure(figsize=(8, 5), facecolor='white')
-
-    plt.plot(xs, rh, linewidth=1, color='cyan')
-    plt.plot(xs, rolling_mean, linewidth=2, color='magenta')
-
-    text_color = 'black'
-
-    ax = plt.gca()
-    ax.set_facecolor('black')
-    plt.grid()
-    plt.title("Total Point History", color=text_color, fontsize=30)
-    plt.xlabel('Episode', color=text_color, fontsize=20)
-    plt.ylabel('Total Points', color=text_color, fontsize=20)
-    ax.tick_params(axis='x', colors=text_color)
-    ax.tick_params(axis='y', colors=text_color)
-    plt.show()
+    plot_curve(average_point_history, "Total Point History", 'Episode', 'Total Points',
+               rolling_window=rolling_window)
@@ -0,0 +1,289 @@
+"""
+Deep Q-learning with the experience collection decoupled from the learning.
+
+Actor processes play vector ball games with the latest broadcast Q-network weights and write
+their transitions into a `SharedReplayBuffer`, each into its own segment. The learner (the
+calling process) samples that buffer and trains without waiting for the games, and broadcasts
+its weights back every `broadcast_every` learning steps. The actors only run NumPy (they act
+with a `NumpyAI`), so they do not share torch's threads with the learner.
+
+Actors that get ahead of the learner by more than `transitions_per_update` transitions per
+learning step wait for it, so the replay stays fresh and epsilon does not decay faster than the
+network learns when the actors have more cores than the learner can keep up with.
+"""
+
+import time
+import queue
+import multiprocessing as mp
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+import torch
+import torch.nn as nn
+from games.ball_game.vector_ball_game import VectorBallGame
+from AI_Types.AI import AI
+from AI_Types.AI_DQL import MEMORY_SIZE, SAMPLE_SIZE, TAU, ENOUGH_POINTS, learning_step, \
+    hard_update_target, choose_actions, get_new_eps, plot_learning_curve
+from AI_Types.numpy_ai import NumpyAI
+from AI_Types.replay_buffer import SharedReplayBuffer
+from instrumentation import timer, flush
+from metrics import MetricsLog
+
+BROADCAST_EVERY = 50        # broadcast the weights every C learning steps
+
+
+class SharedWeights:
+    """
+    Weights of a network in shared memory, published by one process and read by others.
+
+    A version counter precedes the weights. Publishing makes it odd while the weights are
+    written and even again once they are, so a reader that saw the same even version before
+    and after copying the weights has a consistent copy (a sequence lock, readers never block
+    the writer).
+
+    Args:
+        shapes (dict[str, tuple]): The shapes of the weights by name, like a state dict.
+        name (str | None): The shared memory to attach to, created when None.
+    """
+
+    def __init__(self, shapes: dict[str, tuple], name: str | None = None):
+        self.shapes = {key: tuple(shape) for key, shape in shapes.items()}
+        sizes = [int(np.prod(shape)) for shape in self.shapes.values()]
+        self.offsets = np.concatenate([[0], np.cumsum(sizes)]).tolist()
+
+        self.owner = name is None
+        self.memory = SharedMemory(name, create=self.owner, size=8 + 4 * self.offsets[-1])
+        self.version = np.ndarray(1, np.int64, self.memory.buf)
+        self.weights = np.ndarray(self.offsets[-1], np.float32, self.memory.buf, 8)
+        if self.owner:
+            self.version[0] = 0
+
+    def __getstate__(self):
+        return {'shapes': self.shapes, 'name': self.memory.name}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def publish(self, state_dict: dict):
+        """
+        :param state_dict: The state dict of the network, tensors or arrays.
+        """
+
+        self.version[0] += 1
+        for (key, start), end in zip(zip(self.shapes, self.offsets), self.offsets[1:]):
+            weights = state_dict[key]
+            if isinstance(weights, torch.Tensor):
+                weights = weights.detach().cpu().numpy()
+            self.weights[start:end] = weights.ravel()
+        self.version[0] += 1
+
+    def read(self, last_version: int = 0):
+        """
+        :param last_version: The version of the weights the reader has.
+        :return: The version and a copy of the weights by name, or None when there is no newer
+                version (or it is being published).
+        """
+
+        version = int(self.version[0])
+        if version == last_version or version % 2:
+            return None
+
+        state_dict = {key: self.weights[start:end].reshape(self.shapes[key]).copy()
+                      for (key, start), end in zip(zip(self.shapes, self.offsets),
+                                                   self.offsets[1:])}
+        if int(self.version[0]) != version:
+            return None
+
+        return version, state_dict
+
+    def close(self):
+        """
+        Detach from the shared memory, and free it if this instance created it.
+        """
+
+        self.version = self.weights = None
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+
+
+def train_qnet_actor_learner(screen_size, num_actors=2, envs_per_actor=16, num_episodes=300,
+                             lr=1e-3, gamma=0.995, epsilon=0.98, eps_end=0.005, eps_decay=0.96,
+                             target_update_every: int | None = None,
+                             broadcast_every: int = BROADCAST_EVERY,
+                             transitions_per_update: int | None = -1, seed: int | None = None,
+                             print_learning_curve=True, metrics_path: str | None = None):
+    """
+    Train a Q-network on ball games played by `num_actors` actor processes, each stepping
+    `envs_per_actor` games together. Every actor decays its own epsilon once per finished
+    episode of its games, like in `train_qnet_batched`. Training stops after `num_episodes`
+    episodes (of all the actors) or once an episode passes `ENOUGH_POINTS`.
+
+    :param target_update_every: Copy the Q-network into the target network every this many
+            learning steps. When None, the target network is softly updated on every step.
+    :param broadcast_every: Number of learning steps between weight broadcasts to the actors.
+    :param transitions_per_update: Most transitions the actors write per learning step, a tick
+            of every actor by default (like `train_qnet_batched`). When None, they never wait.
+    :param seed: Seeds the learner sampling and, offset by the actor number, the actors.
+    :param print_learning_curve: Plot the average points of the episodes once training is
+            over (blocks until the plot is closed).
+    :param metrics_path: Metrics log receiving a record per finished episode, see `metrics`.
+
+    When `instrumentation` is enabled, the learner phases are flushed every 500 learning steps.
+    """
+    q_net_target = AI(VectorBallGame.STATE_FEATURES, VectorBallGame.NUM_ACTIONS)
+    q_net = AI(VectorBallGame.STATE_FEATURES, VectorBallGame.NUM_ACTIONS)
+    hard_update_target(q_net_target, q_net)
+    criterion = nn.SmoothL1Loss(reduction='none')
+    optimizer = torch.optim.Adam(q_net.parameters(), lr=lr)
+    tau = None if target_update_every else TAU
+
+    mem_buff = SharedReplayBuffer(MEMORY_SIZE, VectorBallGame.STATE_FEATURES, num_actors,
+                                  margin=4 * envs_per_actor, device=q_net.device, seed=seed)
+    weights = SharedWeights({key: tensor.shape for key, tensor in q_net.state_dict().items()})
+    weights.publish(q_net.state_dict())
+    if transitions_per_update == -1:
+        transitions_per_update = num_actors * envs_per_actor
+    # Every actor may write its share of the transitions per update, past a first sample.
+    allowance = None if transitions_per_update is None else \
+        (transitions_per_update / num_actors, SAMPLE_SIZE // num_actors + envs_per_actor)
+    updates = mp.Value('q', 0, lock=False)
+    stop = mp.Event()
+    episodes = mp.Queue()
+    actors = [mp.Process(target=_run_actor, daemon=True, args=(
+        actor, mem_buff, weights, updates, allowance, stop, episodes, screen_size,
+        envs_per_actor, epsilon, eps_end, eps_decay, None if seed is None else seed + actor + 1))
+        for actor in range(num_actors)]
+
+    metrics = MetricsLog(metrics_path, rolling=('average_points',)) if metrics_path else None
+    average_point_history = []
+    num_updates = 0
+    try:
+        for actor in actors:
+            actor.start()
+
+        while len(average_point_history) < num_episodes:
+            # Episodes finished by the actors.
+            solved = False
+            for actor, total_points, num_timesteps, actor_epsilon in _drain(episodes):
+                # The actors may have finished more episodes than are left.
+                if len(average_point_history) == num_episodes:
+                    break
+                average_point_history.append(total_points / num_timesteps)
+                if metrics:
+                    metrics.log(len(average_point_history),
+                                average_points=average_point_history[-1],
+                                total_points=total_points, timesteps=num_timesteps,
+                                epsilon=actor_epsilon, actor=actor)
+                solved |= total_points > ENOUGH_POINTS
+            if solved:
+                print(f"\nLearning terminated! Successfully learned the game in "
+                      f"{len(average_point_history)} episodes!")
+                break
+
+            if len(mem_buff) <= SAMPLE_SIZE:
+                _check_actors(actors)
+                time.sleep(.01)
+                continue
+
+            learning_step(q_net_target, q_net, mem_buff, gamma, criterion, optimizer, tau)
+            num_updates += 1
+            updates.value = num_updates
+            if target_update_every and num_updates % target_update_every == 0:
+                with timer('learner.target_update'):
+                    hard_update_target(q_net_target, q_net)
+            if num_updates % broadcast_every == 0:
+                with timer('learner.broadcast'):
+                    weights.publish(q_net.state_dict())
+
+            if num_updates % 500 == 0:
+                _check_actors(actors)
+                print(f"\r[Episodes: {len(average_point_history)}] Learning steps: "
+                      f"{num_updates} Transitions: {len(mem_buff)}", end='')
+                flush(loop='train_qnet_actor_learner', updates=num_updates,
+                      episodes=len(average_point_history))
+    finally:
+        stop.set()
+        # Actors blocked on a full queue only exit once it is drained.
+        while any(actor.is_alive() for actor in actors):
+            _drain(episodes)
+            for actor in actors:
+                actor.join(timeout=.1)
+        if metrics:
+            metrics.close()
+        mem_buff.close()
+        weights.close()
+
+    print()
+    if print_learning_curve:
+        plot_learning_curve(average_point_history)
+
+    return q_net
+
+
+def _drain(episodes: mp.Queue):
+    items = []
+    while True:
+        try:
+            items.append(episodes.get_nowait())
+        except queue.Empty:
+            return items
+
+
+def _check_actors(actors: list):
+    for actor in actors:
+        if actor.exitcode not in (None, 0):
+            raise RuntimeError(f"Actor {actor.name} exited with code {actor.exitcode}.")
+
+
+def _run_actor(actor: int, mem_buff: SharedReplayBuffer, weights: SharedWeights, updates,
+               allowance: tuple[float, int] | None, stop, episodes: mp.Queue, screen_size,
+               num_envs: int, epsilon: float, eps_end: float, eps_decay: float,
+               seed: int | None):
+    """
+    Play until `stop` is set, acting with the latest broadcast weights and writing the
+    transitions into the segment `actor` of the buffer. Every finished episode is reported as
+    (actor, total points, timesteps, epsilon).
+
+    :param updates: The number of learning steps of the learner.
+    :param allowance: The transitions written per learning step and before the first one,
+            more wait for the learner. None to never wait.
+    """
+    env = VectorBallGame(num_envs, screen_size, game_speed=2., seed=seed)
+    rng = np.random.default_rng(seed)
+
+    version, policy = 0, None
+    while policy is None:
+        if (update := weights.read(version)) is not None:
+            version, state_dict = update
+            policy = NumpyAI(state_dict)
+        else:
+            time.sleep(.001)
+
+    total_points = np.zeros(num_envs)
+    num_timesteps = np.zeros(num_envs, dtype=np.int64)
+    num_transitions = 0
+    states = env.reset()
+    while not stop.is_set():
+        if allowance and num_transitions > allowance[0] * updates.value + allowance[1]:
+            time.sleep(.001)
+            continue
+
+        if (update := weights.read(version)) is not None:
+            version, state_dict = update
+            policy = NumpyAI(state_dict)
+
+        actions = choose_actions(states, env.NUM_ACTIONS, policy, epsilon, rng)
+        next_states, rewards, dones = env.step(actions)
+        mem_buff.extend(states, actions, rewards, next_states, dones, segment=actor)
+        states = next_states
+        num_transitions += num_envs
+
+        total_points += rewards
+        num_timesteps += 1
+        # Episodes finished (the games were already reset by the environment)
+        for env_index in np.flatnonzero(dones | (total_points > ENOUGH_POINTS)):
+            epsilon = get_new_eps(epsilon, eps_decay, eps_end)
+            episodes.put((actor, float(total_points[env_index]),
+                          int(num_timesteps[env_index]), epsilon))
+            total_points[env_index] = 0.
+            num_timesteps[env_index] = 0
@@ -1,46 +1,344 @@
 
+import os
 import random
+import multiprocessing as mp
+from functools import partial
+import numpy as np
 import neat
-import pickle
+from games.vector_env import VectorEnv
+from AI_Types.batched_neat import BatchedFeedForwardNetwork
+from AI_Types.checkpoint import CHECKPOINT_EXTENSION, save_checkpoint, AsyncCheckpointer, \
+    load_snapshot
+from instrumentation import timer, flush
+from metrics import MetricsLog
 
 generation = 0
+WORKER_GAME_NAME = 'Worker genome'
+MAX_FITNESS = 50_000
 
 
-def train_neat(config_file, game_class, num_generations: int = 100, path_for_ai: str | None = None):
-    # Create the game instance
-    game = game_class()
+def train_neat(config_file, game_class, num_generations: int = 100, path_for_ai: str | None = None,
+               num_workers: int = 0, seed: int | None = None, game_kwargs: dict | None = None,
+               checkpoint_path: str | None = None, checkpoint_every: int = 10,
+               metrics_path: str | None = None):
+    """
+    Evolve a NEAT population on the given game.
+
+    :param config_file: Path of the NEAT configuration file.
+    :param game_class: The game class, constructed with `game_kwargs`. A `VectorEnv` subclass
+            is played by the whole population at once, with batched network evaluation.
+    :param num_generations: Number of generations to run.
+    :param path_for_ai: Where to save the best network (without extension), if given.
+    :param num_workers: Number of worker processes evaluating the genomes. When 0, all genomes
+            play together in a single game of this process.
+    :param seed: Seed for the evolution and for the games, makes runs reproducible.
+    :param game_kwargs: Keyword arguments for the game, workers should get a headless game.
+    :param checkpoint_path: Where to snapshot the population every `checkpoint_every`
+            generations (from a background thread). When the file exists, evolution resumes
+            from it and runs the generations left of `num_generations`.
+    :param checkpoint_every: Number of generations between snapshots.
+    :param metrics_path: Metrics log receiving the fitness statistics of every generation,
+            see `metrics`.
+    :return: None
+    """
+    game_kwargs = game_kwargs or {}
+    if seed is not None:
+        random.seed(seed)
 
     config = neat.Config(neat.DefaultGenome, neat.DefaultReproduction,
                          neat.DefaultSpeciesSet, neat.DefaultStagnation,
                          config_file)
     # Create core evolution algorithm class
-    p = neat.Population(config)
+    if checkpoint_path and os.path.exists(checkpoint_path):
+        # The saved config keeps the node and innovation counters of the run.
+        p = restore_population(checkpoint_path)
+        config = p.config
+    else:
+        p = neat.Population(config)
+    global generation
+    generation = p.generation
+    num_generations = max(num_generations - p.generation, 0)
 
     # Create reported
     p.add_reporter(neat.StdOutReporter(True))
     stats = neat.StatisticsReporter()
     p.add_reporter(stats)
+    checkpointer = None
+    if checkpoint_path:
+        checkpointer = AsyncCheckpointer(checkpoint_path, checkpoint_every, compress=True)
+        p.add_reporter(AsyncCheckpointReporter(checkpointer, p.best_genome))
+    metrics = None
+    if metrics_path:
+        metrics = MetricsLog(metrics_path, rolling=('best_fitness', 'mean_fitness'))
+        p.add_reporter(MetricsReporter(metrics))
+
+    install_predict_func()
+
+    # Run NEAT
+    try:
+        if num_generations == 0:
+            print(f"The snapshot is at generation {p.generation}, no generations are left to run.")
+        elif num_workers > 0:
+            evaluator = ParallelEvaluator(num_workers, game_class, game_kwargs, seed)
+            evaluator.generation = p.generation
+            try:
+                p.run(evaluator.evaluate, num_generations)
+            finally:
+                evaluator.close()
+        elif issubclass(game_class, VectorEnv):
+            evaluator = BatchedEvaluator(game_class, game_kwargs, seed)
+            evaluator.generation = p.generation
+            p.run(evaluator.evaluate, num_generations)
+        else:
+            game = game_class(**game_kwargs)
+            p.run(partial(run_generation, game=game), num_generations)
+            game.kill()
+    finally:
+        if checkpointer:
+            checkpointer.close()
+        if metrics:
+            metrics.close()
+
+    best_ai = neat.nn.FeedForwardNetwork.create(p.best_genome, config)
+    save_ai(best_ai, path_for_ai)
+
+
+class AsyncCheckpointReporter(neat.reporting.BaseReporter):
+    """
+    Snapshot the population with an `AsyncCheckpointer` at the end of every
+    `checkpointer.every` generations. Snapshots have the format of `neat.Checkpointer`
+    followed by the best genome so far, they are restored with `restore_population`.
+
+    Args:
+        checkpointer (AsyncCheckpointer): Writes the snapshots.
+        best_genome (neat.DefaultGenome | None): The best genome of a resumed run.
+    """
+
+    def __init__(self, checkpointer: AsyncCheckpointer, best_genome=None):
+        self.checkpointer = checkpointer
+        self.best_genome = best_genome
+        self.generation = None
+
+    def __getstate__(self):
+        # The species set holds the reporters, so the snapshots do too, without the writer.
+        return {'checkpointer': None, 'best_genome': None, 'generation': self.generation}
+
+    def start_generation(self, generation):
+        self.generation = generation
+
+    def post_evaluate(self, config, population, species, best_genome):
+        # Like `neat.Population.best_genome`.
+        if self.best_genome is None or best_genome.fitness > self.best_genome.fitness:
+            self.best_genome = best_genome
+
+    def end_generation(self, config, population, species_set):
+        # The population is already the one of the next generation.
+        next_generation = self.generation + 1
+        if self.checkpointer.is_due(next_generation):
+            self.checkpointer.save((next_generation, config, population, species_set,
+                                    random.getstate(), self.best_genome))
 
-    def predict_func(*args, **kwargs):
-        outputs = neat.nn.FeedForwardNetwork.activate(*args, **kwargs)
 
-        # Return index of the maximum.
-        return outputs.index(max(outputs))
+def restore_population(path: str):
+    """
+    Restore a population from a snapshot of `AsyncCheckpointReporter`, like
+    `neat.Checkpointer.restore_checkpoint` does, with its best genome so far.
 
+    :param path: The snapshot file.
+    :return: The `neat.Population`.
+    """
+    generation, config, population, species_set, random_state, best_genome = \
+        load_snapshot(path)
+    random.setstate(random_state)
+
+    # A new population gets a new innovation tracker, the run one is kept in the config.
+    innovation_tracker = getattr(config.genome_config, 'innovation_tracker', None)
+    p = neat.Population(config, (population, species_set, generation))
+    if innovation_tracker is not None:
+        p.reproduction.innovation_tracker = innovation_tracker
+        config.genome_config.innovation_tracker = innovation_tracker
+    p.best_genome = best_genome
+
+    return p
+
+
+class MetricsReporter(neat.reporting.BaseReporter):
+    """
+    Log the fitness statistics of every generation once it is evaluated.
+
+    Args:
+        metrics (MetricsLog): The log.
+    """
+
+    def __init__(self, metrics: MetricsLog):
+        self.metrics = metrics
+        self.generation = None
+
+    def __getstate__(self):
+        # The species set holds the reporters, so the snapshots do too, without the log.
+        return {'metrics': None, 'generation': self.generation}
+
+    def start_generation(self, generation):
+        self.generation = generation
+
+    def post_evaluate(self, config, population, species, best_genome):
+        fitnesses = np.array([genome.fitness for genome in population.values()])
+        self.metrics.log(self.generation + 1, best_fitness=float(fitnesses.max()),
+                         mean_fitness=float(fitnesses.mean()),
+                         fitness_stdev=float(fitnesses.std()),
+                         num_species=len(species.species))
+
+
+def predict_func(*args, **kwargs):
+    outputs = neat.nn.FeedForwardNetwork.activate(*args, **kwargs)
+
+    # Return index of the maximum.
+    return outputs.index(max(outputs))
+
+
+def install_predict_func():
     # Assign the predict function (that is what the game is using)
     neat.nn.FeedForwardNetwork.predict = predict_func
 
-    # Run NEAT
-    p.run(run_generation, num_generations, game=game)
-    game.kill()
 
-    best_ai = neat.nn.FeedForwardNetwork.create(p.best_genome, config)
-    save_ai(best_ai, path_for_ai)
+class BatchedEvaluator:
+    """
+    Evaluate a generation on a `VectorEnv`, a sub-environment per genome, with the genomes
+    networks compiled into a single `BatchedFeedForwardNetwork`. A genome plays until its game
+    is done or its fitness passes `MAX_FITNESS`, its fitness is the sum of its rewards.
+
+    Every sub-environment draws from its own generator seeded with the generation seed, so all
+    the genomes of a generation face the same game, whatever their row (and whichever genomes
+    are evaluated with them).
+
+    Args:
+        env_class: The `VectorEnv` subclass.
+        env_kwargs (dict | None): Keyword arguments for the environment.
+        seed (int | None): Base seed, generation `i` is played with seed ``seed + i``.
+    """
+
+    def __init__(self, env_class, env_kwargs: dict | None = None, seed: int | None = None):
+        self.env_class = env_class
+        self.env_kwargs = env_kwargs or {}
+        self.seed = seed
+        self.generation = 0
+
+    def evaluate(self, genomes, config):
+        generation_seed = None if self.seed is None else self.seed + self.generation
+        self.generation += 1
+
+        fitnesses = self.get_fitnesses(genomes, config, generation_seed)
+        for (genome_id, genome), fitness in zip(genomes, fitnesses):
+            genome.fitness = fitness
+        flush(loop='neat', generation=self.generation)
+
+    def get_fitnesses(self, genomes, config, seed: int | None = None):
+        with timer('neat.create_nets'):
+            net = BatchedFeedForwardNetwork.create(genomes, config)
+        env = self.env_class(len(genomes), auto_reset=False, seed=seed, **self.env_kwargs)
+
+        states = env.reset(env_seeds=None if seed is None else [seed] * len(genomes))
+        fitnesses = np.zeros(len(genomes))
+        finished = np.zeros(len(genomes), dtype=bool)
+        while not finished.all():
+            with timer('policy.act'):
+                actions = net.predict(states)
+            with timer('env.step'):
+                states, rewards, dones = env.step(actions)
+            fitnesses += rewards * ~finished
+            finished |= dones | (fitnesses > MAX_FITNESS)
+
+        return fitnesses.tolist()
+
+
+class ParallelEvaluator:
+    """
+    Evaluate a generation on a pool of worker processes, each owning its own game instance.
+
+    The genome list is split into one contiguous shard per worker. Every genome plays alone,
+    with the games random state seeded by the generation seed, so all the genomes of a
+    generation face the same game and the fitnesses do not depend on the sharding. For a
+    `VectorEnv` game, each worker plays its whole shard with a `BatchedEvaluator` instead,
+    which gives every genome that same game too.
+
+    Args:
+        num_workers (int): Number of worker processes.
+        game_class: The game class, constructed once per worker with `game_kwargs`.
+        game_kwargs (dict | None): Keyword arguments for the game.
+        seed (int | None): Base seed, generation `i` is played with seed ``seed + i``.
+    """
+
+    def __init__(self, num_workers: int, game_class, game_kwargs: dict | None = None,
+                 seed: int | None = None):
+        self.num_workers = num_workers
+        self.seed = seed
+        self.generation = 0
+        self.pool = mp.Pool(num_workers, initializer=_init_worker,
+                            initargs=(game_class, game_kwargs or {}))
+
+    def evaluate(self, genomes, config):
+        generation_seed = None if self.seed is None else self.seed + self.generation
+        self.generation += 1
+
+        shard_size = -(-len(genomes) // self.num_workers)
+        shards = [genomes[i:i + shard_size] for i in range(0, len(genomes), shard_size)]
+        jobs = [self.pool.apply_async(_eval_shard, (shard, config, generation_seed))
+                for shard in shards]
+
+        # Only the wait is seen from this process, the workers are not instrumented.
+        with timer('neat.play'):
+            for shard, job in zip(shards, jobs):
+                for (genome_id, genome), fitness in zip(shard, job.get()):
+                    genome.fitness = fitness
+        flush(loop='neat', generation=self.generation)
+
+    def close(self):
+        self.pool.close()
+        self.pool.join()
+
+
+_worker_game = None
+
+
+def _init_worker(game_class, game_kwargs: dict):
+    global _worker_game
+    if issubclass(game_class, VectorEnv):
+        _worker_game = BatchedEvaluator(game_class, game_kwargs)
+        return
+
+    install_predict_func()
+    _worker_game = game_class(**game_kwargs)
+
+    # Create the game once, so its construction does not consume the seeded random state.
+    _worker_game.reset_game(WORKER_GAME_NAME)
+
+
+def _eval_shard(genomes, config, seed: int | None):
+    if isinstance(_worker_game, BatchedEvaluator):
+        return _worker_game.get_fitnesses(genomes, config, seed)
+
+    fitnesses = []
+    for genome_id, genome in genomes:
+        if seed is not None:
+            random.seed(seed)
+            # Games with a random generator of their own (FlappyBird) are reseeded too.
+            if hasattr(_worker_game, 'rng'):
+                _worker_game.rng.seed(seed)
+
+        net = neat.nn.FeedForwardNetwork.create(genome, config)
+        _worker_game.reset_game(WORKER_GAME_NAME, ai=net)
+        _worker_game.game_loop()
+        fitnesses.append(_worker_game.fitnesses[WORKER_GAME_NAME])
+
+    return fitnesses
 
 
 def run_generation(genomes, config, game):
-    reset_generation(game, genomes, config)
-    eval_fitness(game, genomes)
+    with timer('neat.create_nets'):
+        reset_generation(game, genomes, config)
+    with timer('neat.play'):
+        eval_fitness(game, genomes)
+    flush(loop='neat', generation=generation)
 
 
 def eval_fitness(game, genomes):
@@ -62,11 +360,20 @@ def reset_generation(game, genomes, config, display_any_game: bool = True):
 
         game.reset_game(get_name_formate(genome_num=i+1), ai=nets[i])
 
+    # Games that step their agents together play the whole generation with one batched network
+    # (networks that can not be batched play one by one).
+    if hasattr(game, 'set_policy'):
+        try:
+            policy = BatchedFeedForwardNetwork(nets)
+        except ValueError:
+            policy = None
+        game.set_policy(policy, [get_name_formate(genome_num=i+1) for i in range(len(genomes))]
+                        if policy else [])
+
 
 def save_ai(ai, path_for_ai: str | None = None):
     if path_for_ai:
-        with open(path_for_ai + ".pickle", 'wb') as f:
-            pickle.dump(ai, f)
+        save_checkpoint(ai, path_for_ai + CHECKPOINT_EXTENSION)
 
 
 def get_name_formate(genome_num: int):
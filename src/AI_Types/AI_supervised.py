@@ -1,28 +1,43 @@
 
+import numpy as np
 import torch
-from torch.utils.data import Dataset, DataLoader
 from AI_Types.AI import AI
+from AI_Types.checkpoint import AsyncCheckpointer, load_snapshot, get_rng_states, set_rng_states
+from instrumentation import timer, timed_iter, flush
+from metrics import MetricsLog
+
+
+class TensorBatchLoader:
+    """
+    Iterates over shuffled mini-batches of a dataset held in two tensors. Every batch is
+    gathered from the tensors at once with a slice of a shuffled index permutation, so the
+    tensors may be backed by memory-mapped arrays. Labels are widened to int64 per batch.
+    """
+    def __init__(self, inputs: torch.Tensor, labels: torch.Tensor, batch_size: int,
+                 shuffle: bool = True):
+        self.inputs = inputs
+        self.labels = labels
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+
+    def __len__(self):
+        return -(-len(self.inputs) // self.batch_size)
+
+    def __iter__(self):
+        num_rows = len(self.inputs)
+        indices = torch.randperm(num_rows) if self.shuffle else torch.arange(num_rows)
+        for start in range(0, num_rows, self.batch_size):
+            batch = indices[start:start + self.batch_size]
+            yield self.inputs[batch], self.labels[batch].long()
 
 
 def load_dataset(infos, actions, batch_size=2048):
-    class BallGameDataset(Dataset):
-        def __init__(self, inputs, labels):
-            self.inputs = inputs
-            self.labels = labels
+    # Convert once to contiguous arrays (no copy for arrays that already are), the tensors
+    # share their memory.
+    inputs = torch.from_numpy(np.ascontiguousarray(infos, dtype=np.float32))
+    labels = torch.from_numpy(np.ascontiguousarray(actions))
 
-        def __len__(self):
-            return len(self.inputs)
-
-        def __getitem__(self, index):
-            input = torch.tensor(self.inputs[index])
-            label = torch.tensor(self.labels[index])
-
-            return input, label
-
-    dataset = BallGameDataset(infos, actions)
-    dataset_loader = DataLoader(dataset, batch_size, shuffle=True)
-
-    return dataset_loader
+    return TensorBatchLoader(inputs, labels, batch_size)
 
 
 def define_optimizers(model: AI, lr=0.001):
@@ -32,46 +47,91 @@ def define_optimizers(model: AI, lr=0.001):
     return loss_func, optimizer
 
 
-def fit(model: AI, train_loader: DataLoader, batch_size, lr=0.001, num_epochs=10,
-        print_cost=False, print_stride=1):
-    loss_func, optimizer = define_optimizers(model, lr=lr)
+def fit(model: AI, train_loader: TensorBatchLoader, batch_size, lr=0.001, num_epochs=10,
+        print_cost=False, print_stride=1, checkpoint_path: str | None = None,
+        checkpoint_every: int = 1, metrics_path: str | None = None):
+    """
+    Train the model on the mini-batches of the loader.
+
+    :param checkpoint_path: Where to snapshot the model, the optimizer and the random state
+            every `checkpoint_every` epochs (from a background thread). When the file exists,
+            training resumes from it.
+    :param checkpoint_every: Number of epochs between snapshots.
+    :param metrics_path: Metrics log receiving the mean loss of every epoch, see `metrics`.
 
-    for epoch in range(num_epochs):
+    When `instrumentation` is enabled, its phases are flushed at the end of every epoch.
+    """
+    if len(train_loader) == 0:
+        raise ValueError("The dataset is empty, there is nothing to train on.")
+
+    loss_func, optimizer = define_optimizers(model, lr=lr)
+    start_epoch = 0
+
+    checkpointer = None
+    if checkpoint_path:
+        snapshot = load_snapshot(checkpoint_path)
+        if snapshot is not None:
+            model.load_state_dict(snapshot['model'])
+            optimizer.load_state_dict(snapshot['optimizer'])
+            set_rng_states(snapshot['rng'])
+            start_epoch = snapshot['epoch']
+        checkpointer = AsyncCheckpointer(checkpoint_path, checkpoint_every)
+    metrics = MetricsLog(metrics_path, rolling=('loss',)) if metrics_path else None
+
+    for epoch in range(start_epoch, num_epochs):
         running_loss = 0.
-        for i, mini_batch in enumerate(train_loader):
+        num_samples = 0
+        for i, mini_batch in enumerate(timed_iter('data.load', train_loader)):
             # get the inputs; data is a list of [inputs, labels]
             inputs, labels = mini_batch
-            inputs = inputs.to(model.DEVICE)
-            labels = labels.to(model.DEVICE)
+            with timer('data.to_device'):
+                inputs = inputs.to(model.device)
+                labels = labels.to(model.device)
 
             # zero the parameter gradients
             optimizer.zero_grad()
 
             # forward + backward + optimize
-            predicts = model(inputs)
-
-            loss = loss_func(predicts, labels)
-            loss.backward()
-            optimizer.step()
+            with timer('learner.forward'):
+                predicts = model(inputs)
+                loss = loss_func(predicts, labels)
+            with timer('learner.backward'):
+                loss.backward()
+                optimizer.step()
 
             # Calc loss
             lloss = loss.item()
+            running_loss += lloss * inputs.size(0)
+            num_samples += inputs.size(0)
 
             if print_cost:
-                running_loss += lloss * inputs.size(0)
                 print(f"\r[epoch: {epoch+1} MB: {i+1}] Loss: {lloss}", end='')
 
+        epoch_loss = running_loss / num_samples
         if print_cost and epoch % print_stride == 0:
-            epoch_loss = running_loss / (len(train_loader) * batch_size)
             print(f"\r[epoch: {epoch + 1}] Total Loss: {epoch_loss}")
+        if metrics:
+            metrics.log(epoch + 1, loss=epoch_loss)
+
+        flush(loop='fit', epoch=epoch + 1)
+        if checkpointer and checkpointer.is_due(epoch + 1):
+            checkpointer.save({'model': model.state_dict(), 'optimizer': optimizer.state_dict(),
+                               'epoch': epoch + 1, 'rng': get_rng_states()})
+
+    if checkpointer:
+        checkpointer.close()
+    if metrics:
+        metrics.close()
 
 
 def train_ai(infos, actions, batch_size=2048, lr=0.001, num_epochs=10,
-             print_cost=False, print_stride=1):
+             print_cost=False, print_stride=1, checkpoint_path: str | None = None,
+             metrics_path: str | None = None):
 
     train_loader = load_dataset(infos, actions, batch_size)
     ai = AI(2, 3)
-    fit(ai, train_loader, batch_size, lr, num_epochs, print_cost, print_stride)
+    fit(ai, train_loader, batch_size, lr, num_epochs, print_cost, print_stride,
+        checkpoint_path=checkpoint_path, metrics_path=metrics_path)
     ai.eval()
 
     return ai
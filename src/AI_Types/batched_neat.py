@@ -0,0 +1,158 @@
+"""
+Batched evaluation of a whole NEAT population.
+"""
+
+import numpy as np
+import neat
+from neat import activations, aggregations
+
+
+def _sigmoid(z):
+    return 1. / (1. + np.exp(-np.clip(5. * z, -60., 60.)))
+
+
+def _tanh(z):
+    return np.tanh(np.clip(2.5 * z, -60., 60.))
+
+
+def _relu(z):
+    return np.maximum(z, 0.)
+
+
+def _identity(z):
+    return z
+
+
+def _clamped(z):
+    return np.clip(z, -1., 1.)
+
+
+# Vectorized versions of the neat activation functions.
+_ACTIVATIONS = {
+    activations.sigmoid_activation: _sigmoid,
+    activations.tanh_activation: _tanh,
+    activations.relu_activation: _relu,
+    activations.identity_activation: _identity,
+    activations.clamped_activation: _clamped,
+}
+
+
+class BatchedFeedForwardNetwork:
+    """
+    The feed-forward networks of a population compiled into padded NumPy tensors.
+
+    Each network's nodes are grouped into layers by their depth from the inputs. A layer holds,
+    for every network, the weights from all the node values computed so far to the layer nodes,
+    so evaluating all the networks is one batched matmul and one activation per layer.
+    Networks with fewer nodes in a layer are padded with zero weights into a scratch column.
+
+    Computes the same outputs as `neat.nn.FeedForwardNetwork.activate` for every network, for
+    networks using sum aggregation and the activations in ``_ACTIVATIONS``.
+
+    Args:
+        nets (list[neat.nn.FeedForwardNetwork]): The networks to compile, all with the same
+                inputs and outputs.
+    """
+
+    def __init__(self, nets: list):
+        self.num_nets = len(nets)
+        self.num_inputs = len(nets[0].input_nodes)
+        self.num_outputs = len(nets[0].output_nodes)
+
+        # Value slots of every network: the inputs, its evaluated nodes, then the outputs that
+        # are never evaluated (their value stays 0).
+        slots, depths = [], []
+        for net in nets:
+            net_slots = {node: i for i, node in enumerate(net.input_nodes)}
+            net_depths = {node: 0 for node in net.input_nodes}
+            for node, act_func, agg_func, bias, response, links in net.node_evals:
+                if agg_func is not aggregations.sum_aggregation:
+                    raise ValueError("Only sum aggregation can be batched.")
+                if act_func not in _ACTIVATIONS:
+                    raise ValueError(f"Activation {act_func.__name__} can not be batched.")
+                net_slots[node] = len(net_slots)
+                net_depths[node] = 1 + max((net_depths.get(i, 0) for i, w in links), default=0)
+            for node in net.output_nodes:
+                net_slots.setdefault(node, len(net_slots))
+            slots.append(net_slots)
+            depths.append(net_depths)
+
+        self.num_slots = max(len(net_slots) for net_slots in slots)
+        scratch = self.num_slots
+        num_layers = max((max(net_depths.values()) for net_depths in depths), default=0)
+
+        self.layers = []
+        for depth in range(1, num_layers + 1):
+            layer_nodes = [[node_eval for node_eval in net.node_evals
+                            if net_depths[node_eval[0]] == depth]
+                           for net, net_depths in zip(nets, depths)]
+            width = max(len(nodes) for nodes in layer_nodes)
+
+            targets = np.full((self.num_nets, width), scratch, dtype=np.int64)
+            weights = np.zeros((self.num_nets, width, self.num_slots))
+            biases = np.zeros((self.num_nets, width))
+            responses = np.zeros((self.num_nets, width))
+            funcs = np.empty((self.num_nets, width), dtype=object)
+            funcs[:] = activations.identity_activation
+
+            for g, (nodes, net_slots) in enumerate(zip(layer_nodes, slots)):
+                for j, (node, act_func, agg_func, bias, response, links) in enumerate(nodes):
+                    targets[g, j] = net_slots[node]
+                    biases[g, j], responses[g, j], funcs[g, j] = bias, response, act_func
+                    for i, w in links:
+                        if i in net_slots:
+                            weights[g, j, net_slots[i]] += w
+
+            # Activations used in the layer, with the mask of the nodes using each.
+            layer_activations = [(_ACTIVATIONS[func], funcs == func) for func in set(funcs.flat)]
+            if len(layer_activations) == 1:
+                layer_activations = [(layer_activations[0][0], None)]
+
+            self.layers.append((targets, weights, biases, responses, layer_activations))
+
+        self.output_slots = np.array([[net_slots[node] for node in net.output_nodes]
+                                      for net, net_slots in zip(nets, slots)])
+        self._rows = np.arange(self.num_nets)[:, None]
+
+    @staticmethod
+    def create(genomes, config):
+        """
+        Compile the phenotypes of a genome list, as given to the fitness function.
+
+        :param genomes: List of (genome_id, genome) pairs.
+        :param config: The NEAT config.
+        :return: BatchedFeedForwardNetwork with a network per genome, in order.
+        """
+
+        nets = [neat.nn.FeedForwardNetwork.create(genome, config) for genome_id, genome in genomes]
+        return BatchedFeedForwardNetwork(nets)
+
+    def activate(self, inputs: np.ndarray):
+        """
+        :param inputs: Array of shape (num_nets, num_inputs), a row per network.
+        :return: Array of shape (num_nets, num_outputs) with the outputs of every network.
+        """
+
+        values = np.zeros((self.num_nets, self.num_slots + 1))
+        values[:, :self.num_inputs] = inputs
+
+        for targets, weights, biases, responses, layer_activations in self.layers:
+            z = biases + responses * np.matmul(weights, values[:, :self.num_slots, None])[..., 0]
+            if layer_activations[0][1] is None:
+                outputs = layer_activations[0][0](z)
+            else:
+                outputs = np.zeros_like(z)
+                for func, mask in layer_activations:
+                    outputs[mask] = func(z[mask])
+            values[self._rows, targets] = outputs
+
+        return values[self._rows, self.output_slots]
+
+    def predict(self, inputs: np.ndarray):
+        """
+        :param inputs: Array of shape (num_nets, num_inputs), a row per network.
+        :return: Array of shape (num_nets,) with the index of the maximal output of every
+                network.
+        """
+
+        return np.argmax(self.activate(inputs), axis=1)
@@ -0,0 +1,384 @@
+"""
+Checkpoints of trained AIs that store only their weights and topology, and snapshots of
+training runs to resume them.
+
+The AI file layout is the safetensors one: an 8-byte little-endian header size, a JSON header
+mapping every array name to its dtype, shape and byte range, then the raw array bytes. The
+header ``__metadata__`` holds the kind of the AI and what is needed to rebuild it. Arrays are
+memory-mapped on load, and torch / neat are only imported for the kind being loaded.
+
+Training snapshots (models, optimizers, replay buffers, populations and random states) are
+pickled by an `AsyncCheckpointer`, they are meant to be resumed by the code that wrote them.
+"""
+
+import io
+import os
+import sys
+import copy
+import gzip
+import json
+import pickle
+import random
+import threading
+import numpy as np
+
+CHECKPOINT_EXTENSION = '.safetensors'
+KIND_AI = 'AI'
+KIND_NEAT = 'neat.nn.FeedForwardNetwork'
+
+_DTYPES = {'F32': np.float32, 'F64': np.float64, 'I64': np.int64, 'U8': np.uint8}
+_DTYPE_NAMES = {np.dtype(dtype): name for name, dtype in _DTYPES.items()}
+_ALIGNMENT = 8
+
+
+def save_tensors(path: str, arrays: dict[str, np.ndarray], metadata: dict[str, str]):
+    """
+    Write arrays and string metadata in the safetensors layout.
+
+    :param path: The file to write.
+    :param arrays: The arrays by name, of the dtypes in ``_DTYPES``.
+    :param metadata: String values describing the arrays.
+    """
+
+    header = {'__metadata__': metadata}
+    chunks, offset = [], 0
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        data = array.tobytes()
+        header[name] = {'dtype': _DTYPE_NAMES[array.dtype], 'shape': list(array.shape),
+                        'data_offsets': [offset, offset + len(data)]}
+        padding = -len(data) % _ALIGNMENT
+        chunks.append(data + b'\0' * padding)
+        offset += len(data) + padding
+
+    # Pad the header with spaces so the arrays start aligned.
+    header = json.dumps(header, separators=(',', ':')).encode()
+    header += b' ' * (-len(header) % _ALIGNMENT)
+
+    with open(path, 'wb') as f:
+        f.write(len(header).to_bytes(8, 'little'))
+        f.write(header)
+        for chunk in chunks:
+            f.write(chunk)
+
+
+def load_tensors(path: str):
+    """
+    Memory-map the arrays of a file written by `save_tensors`. The arrays are copy-on-write,
+    pages are read from disk only when accessed.
+
+    :param path: The file to read.
+    :return: The arrays by name and the metadata.
+    """
+
+    with open(path, 'rb') as f:
+        header_size = int.from_bytes(f.read(8), 'little')
+        header = json.loads(f.read(header_size))
+
+    metadata = header.pop('__metadata__', {})
+    data = np.memmap(path, np.uint8, 'c') if os.path.getsize(path) > 8 + header_size else None
+    arrays = {}
+    for name, info in header.items():
+        start, end = info['data_offsets']
+        dtype = _DTYPES[info['dtype']]
+        if start == end:
+            arrays[name] = np.empty(info['shape'], dtype=dtype)
+        else:
+            start += 8 + header_size
+            end += 8 + header_size
+            arrays[name] = data[start:end].view(dtype).reshape(info['shape'])
+
+    return arrays, metadata
+
+
+def save_checkpoint(ai, path: str):
+    """
+    Save a supervised / deep Q-learning `AI` or a NEAT `FeedForwardNetwork`.
+
+    :param ai: The AI to save.
+    :param path: The checkpoint file.
+    """
+
+    if type(ai).__name__ == 'FeedForwardNetwork':
+        arrays, metadata = _neat_net_to_arrays(ai)
+    else:
+        arrays = {name: tensor.detach().cpu().numpy() for name, tensor in ai.state_dict().items()}
+        # The linear layers in order (AIs of earlier versions had fewer than `AI`).
+        layers = [(name, module) for name, module in ai.named_children()
+                  if type(module).__name__ == 'Linear']
+        metadata = {'kind': KIND_AI, 'layers': ','.join(name for name, module in layers),
+                    'in_features': str(layers[0][1].in_features),
+                    'out_features': str(layers[-1][1].out_features)}
+
+    save_tensors(path, arrays, metadata)
+
+
+def load_checkpoint(path: str, numpy_only: bool = False):
+    """
+    Rebuild the AI saved by `save_checkpoint`.
+
+    :param path: The checkpoint file.
+    :param numpy_only: Load an `AI` as a `NumpyAI`, which only predicts, without importing
+            torch.
+    :return: The `AI` (in eval mode), the `NumpyAI` or the `FeedForwardNetwork`.
+    """
+
+    arrays, metadata = load_tensors(path)
+    if metadata['kind'] == KIND_NEAT:
+        return _neat_net_from_arrays(arrays, metadata)
+    if metadata['kind'] != KIND_AI:
+        raise ValueError(f"Unknown checkpoint kind: {metadata['kind']}")
+
+    from AI_Types.numpy_ai import AI_LAYERS, NumpyAI
+
+    layers = tuple(metadata['layers'].split(',')) if 'layers' in metadata else AI_LAYERS
+    if numpy_only:
+        return NumpyAI(arrays, layers)
+    if layers != AI_LAYERS:
+        raise ValueError(f"{path} holds an AI of an earlier version (layers {', '.join(layers)}), "
+                         f"it can only be loaded with numpy_only.")
+
+    import torch
+    from AI_Types.AI import AI
+
+    ai = AI(int(metadata['in_features']), int(metadata['out_features']))
+    ai.load_state_dict({name: torch.from_numpy(array) for name, array in arrays.items()})
+    ai.eval()
+
+    return ai
+
+
+# Top-level modules of earlier versions, which ran from the AI_Types directory.
+_LEGACY_MODULES = {'AI': 'AI_Types.AI', 'AI_supervised': 'AI_Types.AI_supervised',
+                   'AI_DQL': 'AI_Types.AI_DQL'}
+
+
+class _LegacyUnpickler(pickle.Unpickler):
+    """
+    Unpickles AIs pickled by earlier versions: their modules are looked up under `AI_Types`,
+    and their tensors, which may have been pickled on a GPU, are loaded on the CPU.
+    """
+
+    def find_class(self, module: str, name: str):
+        if module == 'torch.storage' and name == '_load_from_bytes':
+            return _load_storage_on_cpu
+        return super().find_class(_LEGACY_MODULES.get(module, module), name)
+
+
+def _load_storage_on_cpu(data: bytes):
+    import torch
+
+    return torch.load(io.BytesIO(data), map_location='cpu', weights_only=False)
+
+
+def load_pickle(pickle_path: str):
+    """
+    Unpickle an AI pickled by this or earlier versions, on the CPU.
+
+    :param pickle_path: The pickle file.
+    :return: The AI.
+    """
+
+    with open(pickle_path, 'rb') as f:
+        return _LegacyUnpickler(f).load()
+
+
+def convert_pickle(pickle_path: str, path: str):
+    """
+    Convert an AI pickled by earlier versions into a checkpoint. Unpickling needs the classes
+    of the pickled AI to be importable.
+
+    :param pickle_path: The pickle file.
+    :param path: The checkpoint file.
+    """
+
+    save_checkpoint(load_pickle(pickle_path), path)
+
+
+class AsyncCheckpointer:
+    """
+    Writes snapshots of a training run from a background thread. `save` deep-copies the state
+    on the calling thread, so training may go on changing it, and returns without waiting for
+    the disk. A snapshot is written to a temporary file then renamed over `path`, so `path`
+    always holds a complete snapshot. When a snapshot is still waiting for the writer as a
+    newer one is saved, only the newer one is written.
+
+    Args:
+        path (str): The snapshot file.
+        every (int): Snapshot interval, in the training loop units (episodes, epochs, ...).
+        compress (bool): Whether to gzip the snapshot.
+    """
+
+    def __init__(self, path: str, every: int = 1, compress: bool = False):
+        self.path = path
+        self.every = every
+        self.compress = compress
+        self.pending = None
+        self.writing = False
+        self.closed = False
+        self.error = None
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self._write_snapshots, daemon=True)
+        self.thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def is_due(self, step: int):
+        return step % self.every == 0
+
+    def save(self, state):
+        if self.error is not None:
+            raise self.error
+
+        snapshot = copy.deepcopy(state)
+        with self.condition:
+            self.pending = snapshot
+            self.condition.notify_all()
+
+    def wait(self):
+        """
+        Block until every saved snapshot is on disk.
+        """
+
+        with self.condition:
+            self.condition.wait_for(lambda: self.pending is None and not self.writing)
+        if self.error is not None:
+            raise self.error
+
+    def close(self):
+        """
+        Write the last snapshot and stop the writer thread.
+        """
+
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+        self.thread.join()
+        if self.error is not None:
+            raise self.error
+
+    def _write_snapshots(self):
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.pending is not None or self.closed)
+                if self.pending is None:
+                    return
+                snapshot, self.pending = self.pending, None
+                self.writing = True
+
+            try:
+                self._write(snapshot)
+            except Exception as e:
+                self.error = e
+
+            with self.condition:
+                self.writing = False
+                self.condition.notify_all()
+
+    def _write(self, snapshot):
+        temp_path = self.path + '.tmp'
+        with (gzip.open(temp_path, 'wb') if self.compress else open(temp_path, 'wb')) as f:
+            pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temp_path, self.path)
+
+
+def load_snapshot(path: str):
+    """
+    :param path: A snapshot file written by an `AsyncCheckpointer`.
+    :return: The snapshot, or None if there is no such file.
+    """
+
+    if not os.path.exists(path):
+        return None
+
+    with open(path, 'rb') as f:
+        compressed = f.read(2) == b'\x1f\x8b'
+    with (gzip.open(path, 'rb') if compressed else open(path, 'rb')) as f:
+        return pickle.load(f)
+
+
+def get_rng_states():
+    """
+    :return: The states of the global random generators of random, NumPy and (when imported)
+            torch.
+    """
+
+    states = {'random': random.getstate(), 'numpy': np.random.get_state()}
+    if 'torch' in sys.modules:
+        states['torch'] = sys.modules['torch'].get_rng_state()
+
+    return states
+
+
+def set_rng_states(states: dict):
+    random.setstate(states['random'])
+    np.random.set_state(states['numpy'])
+    if 'torch' in states:
+        import torch
+        torch.set_rng_state(states['torch'])
+
+
+def _neat_net_to_arrays(net):
+    """
+    Flatten the node evaluations of a network: a row per node, and its links in a flat array
+    indexed by the link offsets of the nodes.
+    """
+
+    from neat.activations import ActivationFunctionSet
+    from neat.aggregations import AggregationFunctionSet
+
+    activation_names = {func: name for name, func in ActivationFunctionSet().functions.items()}
+    aggregation_names = {func: name for name, func in AggregationFunctionSet().functions.items()}
+
+    nodes, biases, responses, activations, aggregations = [], [], [], [], []
+    link_offsets, link_inputs, link_weights = [0], [], []
+    for node, act_func, agg_func, bias, response, links in net.node_evals:
+        if act_func not in activation_names or agg_func not in aggregation_names:
+            raise ValueError(f"Node {node} uses a custom activation or aggregation function.")
+        nodes.append(node)
+        biases.append(bias)
+        responses.append(response)
+        activations.append(activation_names[act_func])
+        aggregations.append(aggregation_names[agg_func])
+        link_inputs.extend(i for i, w in links)
+        link_weights.extend(w for i, w in links)
+        link_offsets.append(len(link_inputs))
+
+    arrays = {'input_nodes': np.array(net.input_nodes, dtype=np.int64),
+              'output_nodes': np.array(net.output_nodes, dtype=np.int64),
+              'nodes': np.array(nodes, dtype=np.int64),
+              'biases': np.array(biases, dtype=np.float64),
+              'responses': np.array(responses, dtype=np.float64),
+              'link_offsets': np.array(link_offsets, dtype=np.int64),
+              'link_inputs': np.array(link_inputs, dtype=np.int64),
+              'link_weights': np.array(link_weights, dtype=np.float64)}
+    metadata = {'kind': KIND_NEAT, 'activations': json.dumps(activations),
+                'aggregations': json.dumps(aggregations)}
+
+    return arrays, metadata
+
+
+def _neat_net_from_arrays(arrays: dict[str, np.ndarray], metadata: dict[str, str]):
+    import neat
+    from neat.activations import ActivationFunctionSet
+    from neat.aggregations import AggregationFunctionSet
+
+    activation_set, aggregation_set = ActivationFunctionSet(), AggregationFunctionSet()
+    offsets = arrays['link_offsets'].tolist()
+    link_inputs, link_weights = arrays['link_inputs'].tolist(), arrays['link_weights'].tolist()
+
+    node_evals = []
+    for j, (node, bias, response, activation, aggregation) in enumerate(zip(
+            arrays['nodes'].tolist(), arrays['biases'].tolist(), arrays['responses'].tolist(),
+            json.loads(metadata['activations']), json.loads(metadata['aggregations']))):
+        links = list(zip(link_inputs[offsets[j]:offsets[j + 1]],
+                         link_weights[offsets[j]:offsets[j + 1]]))
+        node_evals.append((node, activation_set.get(activation), aggregation_set.get(aggregation),
+                           bias, response, links))
+
+    return neat.nn.FeedForwardNetwork(arrays['input_nodes'].tolist(),
+                                      arrays['output_nodes'].tolist(), node_evals)
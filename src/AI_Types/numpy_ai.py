@@ -0,0 +1,41 @@
+"""
+Inference of a trained `AI` with NumPy only, for processes that only play and should not pay
+for importing torch.
+"""
+
+import numpy as np
+
+AI_LAYERS = ('fc1', 'fc2', 'fc3')
+
+
+class NumpyAI:
+    """
+    The forward pass of an `AI` (linear layers with ReLUs in between), in float32.
+
+    Args:
+        state_dict (dict[str, np.ndarray]): The arrays of the `AI` state dict.
+        layers (tuple[str, ...]): Names of the linear layers, in order. Those of an `AI` by
+                default, AIs of earlier versions had others.
+    """
+
+    def __init__(self, state_dict: dict[str, np.ndarray], layers: tuple[str, ...] = AI_LAYERS):
+        # Linear layers hold (out, in) weights, transposed once for `x @ w`.
+        self.layers = [(np.ascontiguousarray(state_dict[f'{name}.weight'].T, dtype=np.float32),
+                        np.asarray(state_dict[f'{name}.bias'], dtype=np.float32))
+                       for name in layers]
+        self.in_features = self.layers[0][0].shape[0]
+        self.out_features = self.layers[-1][0].shape[1]
+
+    def forward(self, x: np.ndarray):
+        x = np.asarray(x, dtype=np.float32)
+        for weight, bias in self.layers[:-1]:
+            x = np.maximum(x @ weight + bias, 0.)
+        weight, bias = self.layers[-1]
+
+        return x @ weight + bias
+
+    def predict(self, x):
+        return int(np.argmax(self.forward(x)))
+
+    def predict_batch(self, x: np.ndarray):
+        return np.argmax(self.forward(x), axis=1)
@@ -0,0 +1,306 @@
+"""
+Replay buffers for the deep Q-learning agents.
+"""
+
+from collections import namedtuple
+from multiprocessing.shared_memory import SharedMemory
+import numpy as np
+import torch
+
+Batch = namedtuple('Batch', ['states', 'actions', 'rewards', 'next_states', 'dones', 'weights',
+                             'indices'])
+
+
+class ReplayBuffer:
+    """
+    Ring buffer of transitions stored in preallocated NumPy arrays.
+
+    Appending overwrites the oldest transition once the buffer is full, and sampling draws
+    uniform random indices (with replacement) and gathers whole batches with fancy indexing.
+
+    Args:
+        capacity (int): Maximal number of stored transitions.
+        state_features (int): Number of features of a state.
+        device (torch.device | None): Device of the sampled tensors.
+        seed (int | None): Seed of the sampling random generator.
+    """
+
+    def __init__(self, capacity: int, state_features: int, device: torch.device | None = None,
+                 seed: int | None = None):
+        self.capacity = capacity
+        self.device = device or torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        self.rng = np.random.default_rng(seed)
+        self.pos = 0
+        self.size = 0
+
+        self.states = np.zeros((capacity, state_features), dtype=np.float32)
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.next_states = np.zeros((capacity, state_features), dtype=np.float32)
+        self.dones = np.zeros(capacity, dtype=np.float32)
+
+    def __len__(self):
+        return self.size
+
+    def append(self, state, action: int, reward: float, next_state, done: bool):
+        """
+        Store a single transition in O(1).
+        """
+
+        i = self.pos
+        self.states[i] = state
+        self.actions[i] = action
+        self.rewards[i] = reward
+        self.next_states[i] = next_state
+        self.dones[i] = done
+        self._advance(np.array([i]))
+
+    def extend(self, states: np.ndarray, actions: np.ndarray, rewards: np.ndarray,
+               next_states: np.ndarray, dones: np.ndarray):
+        """
+        Store a batch of transitions, each argument has the batch as its first dimension.
+        """
+
+        indices = (self.pos + np.arange(len(actions))) % self.capacity
+        self.states[indices] = states
+        self.actions[indices] = actions
+        self.rewards[indices] = rewards
+        self.next_states[indices] = next_states
+        self.dones[indices] = dones
+        self._advance(indices)
+
+    def _advance(self, indices: np.ndarray):
+        self.pos = (self.pos + len(indices)) % self.capacity
+        self.size = min(self.size + len(indices), self.capacity)
+
+    def sample(self, batch_size: int):
+        """
+        :return: A `Batch` of tensors on the buffer device, with no importance weights.
+        """
+
+        indices = self.rng.integers(0, self.size, batch_size)
+        return self._gather(indices)
+
+    def _gather(self, indices: np.ndarray, weights: torch.Tensor | None = None):
+        return Batch(*(torch.from_numpy(array[indices]).to(self.device) for array in
+                       (self.states, self.actions, self.rewards, self.next_states, self.dones)),
+                     weights, indices)
+
+
+class SumTree:
+    """
+    Complete binary tree over the leaf priorities, every node holds the sum of its children.
+    Leaves live at ``size + i`` and the root at 1, all operations are vectorized over batches.
+
+    Args:
+        capacity (int): Number of leaves, rounded up to a power of two.
+    """
+
+    def __init__(self, capacity: int):
+        self.size = 1 << max(capacity - 1, 0).bit_length()
+        self.depth = self.size.bit_length() - 1
+        self.tree = np.zeros(2 * self.size)
+
+    def total(self):
+        return self.tree[1]
+
+    def update(self, indices: np.ndarray, priorities: np.ndarray):
+        nodes = indices + self.size
+        self.tree[nodes] = priorities
+        for _ in range(self.depth):
+            # Recomputing (not adding to) the parents keeps repeated indices correct.
+            nodes = np.unique(nodes // 2)
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+
+    def find(self, values: np.ndarray):
+        """
+        :param values: Array of prefix sums in [0, total).
+        :return: The leaf indices whose cumulative priority range contains each value.
+        """
+
+        nodes = np.ones(len(values), dtype=np.int64)
+        values = values.copy()
+        for _ in range(self.depth):
+            left = 2 * nodes
+            go_right = values >= self.tree[left]
+            values -= self.tree[left] * go_right
+            nodes = left + go_right
+
+        return nodes - self.size
+
+
+class PrioritizedReplayBuffer(ReplayBuffer):
+    """
+    Replay buffer sampling transitions proportionally to their priority (TD error) ** alpha,
+    with importance sampling weights (N * P(i)) ** -beta normalized by their maximum. New
+    transitions get the maximal priority seen so far.
+
+    Args:
+        capacity (int): Maximal number of stored transitions.
+        state_features (int): Number of features of a state.
+        alpha (float): How much the priorities shape the sampling distribution.
+        beta (float): Importance sampling correction strength.
+        device (torch.device | None): Device of the sampled tensors.
+        seed (int | None): Seed of the sampling random generator.
+    """
+
+    def __init__(self, capacity: int, state_features: int, alpha: float = 0.6, beta: float = 0.4,
+                 device: torch.device | None = None, seed: int | None = None):
+        super().__init__(capacity, state_features, device, seed)
+        self.alpha = alpha
+        self.beta = beta
+        self.eps = 1e-6
+        self.max_priority = 1.
+        self.tree = SumTree(capacity)
+
+    def _advance(self, indices: np.ndarray):
+        self.tree.update(indices, np.full(len(indices), self.max_priority ** self.alpha))
+        super()._advance(indices)
+
+    def sample(self, batch_size: int):
+        """
+        :return: A `Batch` of tensors on the buffer device, with importance weights.
+        """
+
+        # Stratified sampling, one value per equal slice of the total priority.
+        total = self.tree.total()
+        values = (np.arange(batch_size) + self.rng.random(batch_size)) * (total / batch_size)
+        indices = np.minimum(self.tree.find(values), self.size - 1)
+
+        probabilities = self.tree.tree[indices + self.tree.size] / total
+        weights = (self.size * probabilities) ** -self.beta
+        weights /= weights.max()
+
+        return self._gather(indices, torch.from_numpy(weights.astype(np.float32)).to(self.device))
+
+    def update_priorities(self, indices: np.ndarray, td_errors: np.ndarray):
+        priorities = np.abs(td_errors) + self.eps
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+        self.tree.update(indices, priorities ** self.alpha)
+
+
+class SharedReplayBuffer(ReplayBuffer):
+    """
+    Replay buffer in shared memory, filled by several processes and sampled by another.
+
+    Every writer owns a segment of the buffer, a ring of ``capacity // num_segments``
+    transitions of its own, so writers never contend and no lock is taken. A writer publishes
+    a batch by advancing its segment counters once the batch is written. Sampling is uniform
+    over the published transitions, except for the `margin` slots following the write position
+    of every full segment, the ones its writer may be overwriting while the batch is gathered.
+
+    The buffer is pickled by name, the unpickled buffer attaches to the same memory (for spawned
+    processes, forked ones share it anyway). Only the buffer that created the memory unlinks it.
+
+    Args:
+        capacity (int): Maximal number of stored transitions, split between the segments.
+        state_features (int): Number of features of a state.
+        num_segments (int): Number of writers.
+        margin (int): Number of slots ahead of the writers not sampled, at least the size of
+                the batches they write.
+        device (torch.device | None): Device of the sampled tensors.
+        seed (int | None): Seed of the sampling random generator.
+    """
+
+    def __init__(self, capacity: int, state_features: int, num_segments: int = 1,
+                 margin: int = 1024, device: torch.device | None = None,
+                 seed: int | None = None, name: str | None = None):
+        self.segment_capacity = capacity // num_segments
+        if self.segment_capacity <= margin:
+            raise ValueError(f"Segments of {self.segment_capacity} transitions do not fit a "
+                             f"margin of {margin}.")
+        self.capacity = self.segment_capacity * num_segments
+        self.state_features = state_features
+        self.num_segments = num_segments
+        self.margin = margin
+        self.device = device or torch.device("cuda" if torch.cuda.is_available() else "cpu")
+        self.rng = np.random.default_rng(seed)
+
+        # Counters (position and size of every segment) then the transition arrays.
+        layout = [('counters', np.int64, (num_segments, 2)),
+                  ('states', np.float32, (self.capacity, state_features)),
+                  ('actions', np.int64, (self.capacity,)),
+                  ('rewards', np.float32, (self.capacity,)),
+                  ('next_states', np.float32, (self.capacity, state_features)),
+                  ('dones', np.float32, (self.capacity,))]
+        sizes = [-(-np.dtype(dtype).itemsize * int(np.prod(shape)) // 8) * 8
+                 for _, dtype, shape in layout]
+
+        self.owner = name is None
+        self.memory = SharedMemory(name, create=self.owner, size=sum(sizes))
+        offset = 0
+        for (attribute, dtype, shape), size in zip(layout, sizes):
+            setattr(self, attribute, np.ndarray(shape, dtype, self.memory.buf, offset))
+            offset += size
+        if self.owner:
+            self.counters[:] = 0
+
+    def __getstate__(self):
+        return {'capacity': self.capacity, 'state_features': self.state_features,
+                'num_segments': self.num_segments, 'margin': self.margin, 'device': self.device,
+                'name': self.memory.name}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def __len__(self):
+        return int(self.counters[:, 1].sum())
+
+    def append(self, state, action: int, reward: float, next_state, done: bool,
+               segment: int = 0):
+        self.extend(np.asarray([state]), np.asarray([action]), np.asarray([reward]),
+                    np.asarray([next_state]), np.asarray([done]), segment)
+
+    def extend(self, states: np.ndarray, actions: np.ndarray, rewards: np.ndarray,
+               next_states: np.ndarray, dones: np.ndarray, segment: int = 0):
+        """
+        Store a batch of transitions in the segment of the calling writer.
+        """
+
+        if len(actions) > self.margin:
+            raise ValueError(f"Batches of {len(actions)} transitions exceed the margin.")
+
+        pos, size = self.counters[segment].tolist()
+        indices = segment * self.segment_capacity + (pos + np.arange(len(actions))) \
+            % self.segment_capacity
+        self.states[indices] = states
+        self.actions[indices] = actions
+        self.rewards[indices] = rewards
+        self.next_states[indices] = next_states
+        self.dones[indices] = dones
+
+        # Publish the batch.
+        self.counters[segment] = ((pos + len(actions)) % self.segment_capacity,
+                                  min(size + len(actions), self.segment_capacity))
+
+    def sample(self, batch_size: int):
+        """
+        :return: A `Batch` of tensors on the buffer device, with no importance weights.
+        """
+
+        counters = self.counters.copy()
+        positions, sizes = counters[:, 0], counters[:, 1]
+        full = sizes == self.segment_capacity
+        valid = np.where(full, self.segment_capacity - self.margin, sizes)
+        ends = np.cumsum(valid)
+
+        # Draw among the valid slots of all the segments, then locate them in their segment.
+        draws = self.rng.integers(0, ends[-1], batch_size)
+        segments = np.searchsorted(ends, draws, side='right')
+        slots = draws - (ends - valid)[segments]
+        slots = np.where(full[segments],
+                         (positions[segments] + self.margin + slots) % self.segment_capacity,
+                         slots)
+
+        return self._gather(segments * self.segment_capacity + slots)
+
+    def close(self):
+        """
+        Detach from the shared memory, and free it if this buffer created it.
+        """
+
+        for attribute in ('counters', 'states', 'actions', 'rewards', 'next_states', 'dones'):
+            setattr(self, attribute, None)
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
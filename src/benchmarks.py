@@ -0,0 +1,486 @@
+"""
+Performance benchmarks of the games, the AIs and the training loops.
+
+Every benchmark reports one number (a rate or a latency), the results are written as JSON and
+can be compared against a stored baseline to flag regressions. Benchmarks with a budget (like
+the startup times of game_learn) fail the run when they exceed it, baseline or not:
+
+    python benchmarks.py --output results.json
+    python benchmarks.py --baseline results.json --tolerance 0.1
+
+Run from the src directory. Rendered benchmarks draw to SDL's dummy video driver unless
+--display is given.
+"""
+
+import os
+import io
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import contextlib
+import subprocess
+
+import numpy as np
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+AI_TYPES_DIR = os.path.join(SRC_DIR, 'AI_Types')
+
+# Modules that the game_learn commands that do not train must not import.
+HEAVY_MODULES = ('torch', 'neat', 'matplotlib', 'pandas')
+
+# name -> (function, unit, higher_is_better, budget)
+BENCHMARKS = {}
+
+
+def benchmark(name: str, unit: str, higher_is_better: bool = True, budget: float | None = None):
+    """
+    Register a benchmark, a function of the `quick` flag returning the measured value.
+
+    :param budget: The worst acceptable value, if any.
+    """
+
+    def register(func):
+        BENCHMARKS[name] = (func, unit, higher_is_better, budget)
+        return func
+
+    return register
+
+
+def measure_rate(step, min_time: float, batch: int = 1):
+    """
+    Call `step` until `min_time` seconds passed.
+
+    :param step: Function doing `batch` units of work per call.
+    :return: Units of work per second.
+    """
+
+    step()  # Warm up.
+    num_calls = 0
+    start = time.perf_counter()
+    while (elapsed := time.perf_counter() - start) < min_time:
+        step()
+        num_calls += 1
+
+    return num_calls * batch / elapsed
+
+
+def _min_time(quick: bool):
+    return .2 if quick else 1.
+
+
+def _import_flappy_bird():
+    # The flappy bird module imports its constants relative to its own directory.
+    flappy_bird_dir = os.path.join(SRC_DIR, 'games', 'flappy_bird')
+    if flappy_bird_dir not in sys.path:
+        sys.path.append(flappy_bird_dir)
+    from flappy_bird import FlappyBird
+
+    return FlappyBird
+
+
+# Games
+
+def _ball_game_steps(quick: bool, headless: bool):
+    from games.ball_game.ball_game import BallGame
+
+    game = BallGame(headless=headless)
+    game.reset_game('bench', save_fitness=False)
+    rng = np.random.default_rng(0)
+
+    def step():
+        game.make_action('bench', int(rng.integers(3)))
+        if game.is_lose('bench'):
+            game.reset_game('bench', save_fitness=False)
+
+    return measure_rate(step, _min_time(quick))
+
+
+@benchmark('ball_game.headless', 'steps/s')
+def ball_game_headless(quick: bool):
+    return _ball_game_steps(quick, headless=True)
+
+
+@benchmark('ball_game.rendered', 'steps/s')
+def ball_game_rendered(quick: bool):
+    return _ball_game_steps(quick, headless=False)
+
+
+def _flappy_bird_steps(quick: bool, render: bool, num_birds: int = 100):
+    FlappyBird = _import_flappy_bird()
+
+    class Policy:
+        rng = np.random.default_rng(0)
+
+        def predict(self, states):
+            return (self.rng.random(len(states)) < .9).astype(np.int64)
+
+    game = FlappyBird(render=render, seed=0, mute=True)
+    names = list(range(num_birds))
+    policy = Policy()
+
+    def reset():
+        for name in names:
+            game.reset_game(name, ai=policy)
+        game.set_policy(policy, names)
+        game.pipe_list.clear()
+        game.frame = 0
+
+    def step():
+        if not game.alive.any():
+            reset()
+        game.step()
+        if render:
+            game.draw()
+
+    reset()
+    return measure_rate(step, _min_time(quick))
+
+
+@benchmark('flappy_bird.headless', 'frames/s')
+def flappy_bird_headless(quick: bool):
+    return _flappy_bird_steps(quick, render=False)
+
+
+@benchmark('flappy_bird.rendered', 'frames/s')
+def flappy_bird_rendered(quick: bool):
+    return _flappy_bird_steps(quick, render=True)
+
+
+def _platformer_steps(quick: bool, render: bool):
+    from games.platformer_game.platformer_game import Platformer
+
+    game = Platformer(headless=not render)
+
+    def step():
+        game.step()
+        if game.player.rect.top > 600:
+            game.reset_game()
+        if render:
+            game.draw()
+
+    return measure_rate(step, _min_time(quick))
+
+
+@benchmark('platformer.headless', 'steps/s')
+def platformer_headless(quick: bool):
+    return _platformer_steps(quick, render=False)
+
+
+@benchmark('platformer.rendered', 'steps/s')
+def platformer_rendered(quick: bool):
+    return _platformer_steps(quick, render=True)
+
+
+def _vector_env_steps(env_class, quick: bool, num_envs: int = 256):
+    env = env_class(num_envs, seed=0)
+    env.reset()
+    rng = np.random.default_rng(0)
+    actions = rng.integers(0, env.NUM_ACTIONS, (64, num_envs))
+    ticks = iter(range(10 ** 12))
+
+    def step():
+        env.step(actions[next(ticks) % len(actions)])
+
+    return measure_rate(step, _min_time(quick), batch=num_envs)
+
+
+@benchmark('vector_ball_game', 'steps/s')
+def vector_ball_game(quick: bool):
+    from games.ball_game.vector_ball_game import VectorBallGame
+    return _vector_env_steps(VectorBallGame, quick)
+
+
+@benchmark('vector_flappy_bird', 'steps/s')
+def vector_flappy_bird(quick: bool):
+    from games.flappy_bird.vector_flappy_bird import VectorFlappyBird
+    return _vector_env_steps(VectorFlappyBird, quick)
+
+
+@benchmark('vector_platformer', 'steps/s')
+def vector_platformer(quick: bool):
+    from games.platformer_game.vector_platformer import VectorPlatformer
+    return _vector_env_steps(VectorPlatformer, quick)
+
+
+# AIs
+
+@benchmark('ai.predict', 'us/call', higher_is_better=False)
+def ai_predict(quick: bool):
+    from AI_Types.AI import AI
+
+    ai = AI(2, 3)
+    state = [.5, .25]
+    return 1e6 / measure_rate(lambda: ai.predict(state), _min_time(quick))
+
+
+@benchmark('ai.predict_batch_256', 'states/s')
+def ai_predict_batch(quick: bool):
+    from AI_Types.AI import AI
+
+    ai = AI(2, 3)
+    states = np.random.default_rng(0).random((256, 2), dtype=np.float32)
+    return measure_rate(lambda: ai.predict_batch(states), _min_time(quick), batch=len(states))
+
+
+def _learning_steps(quick: bool, sample_size: int, memory_size: int, prioritized: bool = False):
+    import torch
+    import torch.nn as nn
+    from AI_Types.AI import AI
+    from AI_Types.AI_DQL import learning_step, hard_update_target, TAU
+    from AI_Types.replay_buffer import ReplayBuffer, PrioritizedReplayBuffer
+
+    q_net_target, q_net = AI(2, 3), AI(2, 3)
+    hard_update_target(q_net_target, q_net)
+    buffer_class = PrioritizedReplayBuffer if prioritized else ReplayBuffer
+    mem_buff = buffer_class(memory_size, 2, device=q_net.device, seed=0)
+    rng = np.random.default_rng(0)
+    mem_buff.extend(rng.random((memory_size, 2), dtype=np.float32),
+                    rng.integers(0, 3, memory_size), rng.random(memory_size, dtype=np.float32),
+                    rng.random((memory_size, 2), dtype=np.float32), rng.random(memory_size) < .01)
+
+    criterion = nn.SmoothL1Loss(reduction='none')
+    optimizer = torch.optim.Adam(q_net.parameters(), lr=1e-3)
+
+    return measure_rate(lambda: learning_step(q_net_target, q_net, mem_buff, .995, criterion,
+                                              optimizer, TAU, sample_size), _min_time(quick))
+
+
+for _sample_size in (64, 128, 512):
+    for _memory_size in (10_000, 100_000):
+        benchmark(f'dql.learning_step.batch_{_sample_size}.memory_{_memory_size}', 'updates/s')(
+            lambda quick, s=_sample_size, m=_memory_size: _learning_steps(quick, s, m))
+
+
+@benchmark('dql.learning_step.prioritized.batch_128.memory_100000', 'updates/s')
+def prioritized_learning_steps(quick: bool):
+    return _learning_steps(quick, 128, 100_000, prioritized=True)
+
+
+@benchmark('supervised.fit', 'epochs/s')
+def supervised_fit(quick: bool):
+    from AI_Types.AI import AI
+    from AI_Types.AI_supervised import load_dataset, fit
+
+    num_rows = 20_000 if quick else 200_000
+    rng = np.random.default_rng(0)
+    infos = rng.random((num_rows, 2), dtype=np.float32)
+    actions = rng.integers(0, 3, num_rows).astype(np.uint8)
+    train_loader = load_dataset(infos, actions, batch_size=2048)
+    ai = AI(2, 3)
+
+    return measure_rate(lambda: fit(ai, train_loader, 2048, num_epochs=1), _min_time(quick))
+
+
+def _neat_generation(quick: bool, game_class, config_file: str, game_kwargs: dict):
+    from AI_Types.AI_evolution import train_neat
+
+    num_generations = 1 if quick else 3
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        train_neat(config_file, game_class, num_generations=num_generations, seed=0,
+                   game_kwargs=game_kwargs)
+
+    return (time.perf_counter() - start) / num_generations
+
+
+@benchmark('neat.generation.ball_game', 's/generation', higher_is_better=False)
+def neat_generation_ball_game(quick: bool):
+    from games.ball_game.ball_game import BallGame
+    return _neat_generation(quick, BallGame, os.path.join(AI_TYPES_DIR, 'neat_configs.txt'),
+                            {'headless': True})
+
+
+@benchmark('neat.generation.vector_ball_game', 's/generation', higher_is_better=False)
+def neat_generation_vector_ball_game(quick: bool):
+    from games.ball_game.vector_ball_game import VectorBallGame
+    return _neat_generation(quick, VectorBallGame,
+                            os.path.join(AI_TYPES_DIR, 'neat_configs.txt'), {})
+
+
+@benchmark('neat.generation.flappy_bird', 's/generation', higher_is_better=False)
+def neat_generation_flappy_bird(quick: bool):
+    return _neat_generation(quick, _import_flappy_bird(),
+                            os.path.join(AI_TYPES_DIR, 'flappy_bird_neat_configs.txt'),
+                            {'render': False, 'seed': 0})
+
+
+# Command line startup
+
+def _process_time(quick: bool, code: str):
+    """
+    Time a fresh Python process running `code` from the src directory.
+
+    :return: The best time of the runs, and the output of the code.
+    """
+
+    times = []
+    for _ in range(3 if quick else 10):
+        start = time.perf_counter()
+        result = subprocess.run([sys.executable, '-c', code], cwd=SRC_DIR, capture_output=True,
+                                text=True, check=True)
+        times.append(time.perf_counter() - start)
+
+    return min(times), result.stdout
+
+
+def _startup_time(quick: bool, code: str, allowed: tuple[str, ...] = ()):
+    """
+    Time a fresh process running `code`, checking that it imported none of ``HEAVY_MODULES``
+    but the `allowed` ones.
+    """
+
+    heavy_modules = tuple(name for name in HEAVY_MODULES if name not in allowed)
+    code += f"\nimport sys\nprint(*(name for name in {heavy_modules!r} if name in sys.modules))"
+    seconds, output = _process_time(quick, code)
+    imported = output.split('\n')[-2]  # Only the last line, pygame prints too.
+    if imported:
+        raise RuntimeError(f"Imported {imported} running: {code}")
+
+    return seconds
+
+
+def _load_ai_time(quick: bool, ai, numpy_only: bool, allowed: tuple[str, ...] = ()):
+    from AI_Types.checkpoint import CHECKPOINT_EXTENSION, save_checkpoint
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'ai')
+        save_checkpoint(ai, path + CHECKPOINT_EXTENSION)
+        return _startup_time(quick, f"import game_learn\n"
+                                    f"game_learn.load_ai({path!r}, numpy_only={numpy_only})",
+                             allowed)
+
+
+@benchmark('cli.import', 's', higher_is_better=False, budget=.5)
+def cli_import(quick: bool):
+    return _startup_time(quick, "import game_learn")
+
+
+@benchmark('cli.load_ai.ai', 's', higher_is_better=False, budget=1.)
+def cli_load_ai(quick: bool):
+    from AI_Types.AI import AI
+    return _load_ai_time(quick, AI(2, 3), numpy_only=True)
+
+
+@benchmark('cli.load_ai.neat', 's', higher_is_better=False, budget=1.)
+def cli_load_neat(quick: bool):
+    import neat
+    from neat.activations import sigmoid_activation
+    from neat.aggregations import sum_aggregation
+
+    net = neat.nn.FeedForwardNetwork([-1, -2], [0, 1, 2], [
+        (node, sigmoid_activation, sum_aggregation, 0., 1., [(-1, .5), (-2, -.5)])
+        for node in range(3)])
+    return _load_ai_time(quick, net, numpy_only=True, allowed=('neat',))
+
+
+# Running and comparing
+
+def run_benchmarks(names: list[str], quick: bool = False):
+    """
+    :return: The results by benchmark name, each with its value, unit and direction.
+    """
+
+    results = {}
+    for name in names:
+        func, unit, higher_is_better, budget = BENCHMARKS[name]
+        print(f"{name} ...", end=' ', flush=True)
+        value = func(quick)
+        print(f"{value:.6g} {unit}")
+        results[name] = {'value': value, 'unit': unit, 'higher_is_better': higher_is_better,
+                         'budget': budget}
+
+    return results
+
+
+def over_budget(results: dict):
+    """
+    :return: The names of the benchmarks worse than their budget.
+    """
+
+    return [name for name, result in results.items() if result['budget'] is not None and
+            (result['value'] < result['budget'] if result['higher_is_better'] else
+             result['value'] > result['budget'])]
+
+
+def compare(results: dict, baseline: dict, tolerance: float):
+    """
+    Print the change of every benchmark against the baseline.
+
+    :param tolerance: Relative slowdown above which a benchmark is a regression.
+    :return: The names of the regressed benchmarks.
+    """
+
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+
+        base = baseline[name]['value']
+        speedup = result['value'] / base if result['higher_is_better'] else base / result['value']
+        regressed = speedup < 1 - tolerance
+        if regressed:
+            regressions.append(name)
+        print(f"{name:60} {base:12.6g} -> {result['value']:12.6g} {result['unit']:14} "
+              f"x{speedup:.2f}{'  REGRESSION' if regressed else ''}")
+
+    return regressions
+
+
+def get_environment():
+    import torch
+    return {'python': platform.python_version(), 'platform': platform.platform(),
+            'numpy': np.__version__, 'torch': torch.__version__,
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S')}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('names', nargs='*', help="Benchmarks (or name prefixes) to run.")
+    parser.add_argument('--output', help="Write the results to this JSON file.")
+    parser.add_argument('--baseline', help="Compare the results to this JSON file.")
+    parser.add_argument('--tolerance', type=float, default=.1,
+                        help="Relative slowdown reported as a regression (default 0.1).")
+    parser.add_argument('--quick', action='store_true', help="Shorter runs, noisier numbers.")
+    parser.add_argument('--display', action='store_true',
+                        help="Render to a real display instead of SDL's dummy driver.")
+    parser.add_argument('--list', action='store_true', help="List the benchmarks and exit.")
+    args = parser.parse_args()
+
+    if args.list:
+        print('\n'.join(BENCHMARKS))
+        return
+
+    if not args.display:
+        os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+        os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+    names = [name for name in BENCHMARKS
+             if not args.names or any(name.startswith(prefix) for prefix in args.names)]
+    results = run_benchmarks(names, args.quick)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'environment': get_environment(), 'results': results}, f, indent=2)
+
+    failed = False
+    for name in over_budget(results):
+        print(f"{name} is over its budget: {results[name]['value']:.6g} "
+              f"(budget {results[name]['budget']:.6g} {results[name]['unit']})")
+        failed = True
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)['results']
+        if compare(results, baseline, args.tolerance):
+            failed = True
+
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,79 +1,213 @@
 # This is a sample Python script.
 
-import sys
+import os
 import pickle
-from games.ball_game.ball_game import BallGame
-from AI_Types.AI_supervised import train_ai
-from AI_Types.AI_DQL import train_qnet
-from AI_Types.AI_evolution import train_neat
+import argparse
+
+# Only the standard library is imported up front, every command imports what it needs (torch
+# alone takes seconds to import), so short-lived `play` / `ai` processes start fast.
 
 S_WIDTH = 800
 S_HEIGHT = 600
 
 
-def main():
-    if len(sys.argv) >= 2:
-        if sys.argv[1] == 'save':
-            game = BallGame((S_WIDTH, S_HEIGHT))
-            game.reset(collect_data=True)
-            infos, actions = game.get_data()
-            save_infos_actions(infos, actions, sys.argv[2])
+def save_command(args):
+    from games.ball_game.ball_game import BallGame
+    from gameplay_dataset import GameplayWriter, StreamingRecorder
+
+    # Frames are streamed to the dataset directory by a background thread while playing.
+    with GameplayWriter(args.dataset, BallGame.STATE_FEATURES) as writer, \
+            StreamingRecorder(writer.extend, BallGame.STATE_FEATURES) as recorder:
+        game = BallGame((S_WIDTH, S_HEIGHT), collect_data=True, data_writer=recorder)
+        game.reset_game(save_fitness=False)
+        game.game_loop()
+
+
+def train_command(args):
+    from gameplay_dataset import load_gameplay
+
+    infos, actions = load_gameplay(args.dataset)
+    save_ai(infos, actions, args.ai, checkpoint_path=args.checkpoint, metrics_path=args.metrics)
+
+
+def convert_command(args):
+    import numpy as np
+    from gameplay_dataset import GameplayWriter
+
+    infos, actions = load_infos_actions(args.pickle)
+    infos = np.asarray(infos, dtype=np.float32)
+    # Early gameplays hold positions in pixels, recorded states are divided by the screen width.
+    if infos.max(initial=0.) > 1.:
+        print(f"Normalizing the positions by the screen width ({S_WIDTH}).")
+        infos /= S_WIDTH
+    with GameplayWriter(args.dataset, infos.shape[1]) as writer:
+        writer.extend(infos, actions)
+
+
+def convert_ai_command(args):
+    from AI_Types.checkpoint import CHECKPOINT_EXTENSION, convert_pickle
+
+    convert_pickle(args.pickle + ".pickle", args.ai + CHECKPOINT_EXTENSION)
 
-        elif sys.argv[1] == 'train':
-            infos, actions = load_infos_actions(sys.argv[2])
-            save_ai(infos, actions, sys.argv[3])
 
-        elif sys.argv[1] == 'play':
-            game = BallGame((S_WIDTH, S_HEIGHT))
-            game.reset_game(save_fitness=False)
-            game.game_loop()
+def play_command(args):
+    from games.ball_game.ball_game import BallGame
 
-        elif sys.argv[1] == 'ai':
-            ai = load_ai(sys.argv[2])
+    game = BallGame((S_WIDTH, S_HEIGHT))
+    game.reset_game(save_fitness=False)
+    game.game_loop()
 
-            def predict_func(*args, **kwargs):
-                outputs = ai.activate(*args, **kwargs)
 
-                # Return index of the maximum.
-                return outputs.index(max(outputs))
+def ai_command(args):
+    from games.ball_game.ball_game import BallGame
 
-            # Assign the predict function (that is what the game is using)
-            ai.predict = predict_func
-            game = BallGame((S_WIDTH, S_HEIGHT))
-            game.reset_game(game_title='Ai playing', game_speed=0.4, save_fitness=False, ai=ai)
-            game.game_loop()
+    ai = load_ai(args.ai, numpy_only=True)
 
-        elif sys.argv[1] == 'qlearn':
-            train_qnet((S_WIDTH, S_HEIGHT), num_episodes=30, gamma=0.9,
-                       eps_end=0, eps_decay=0.93)
+    if not hasattr(ai, 'predict'):
+        def predict_func(*args, **kwargs):
+            outputs = ai.activate(*args, **kwargs)
 
-        elif sys.argv[1] == 'NEAT':
-            train_neat(sys.argv[3], num_generations=300, screen_size=(S_WIDTH, S_HEIGHT),
-                       display_game=True, path_for_ai=sys.argv[2])
+            # Return index of the maximum.
+            return outputs.index(max(outputs))
 
+        # Assign the predict function (that is what the game is using)
+        ai.predict = predict_func
+    game = BallGame((S_WIDTH, S_HEIGHT))
+    game.reset_game(game_title='Ai playing', game_speed=0.4, save_fitness=False, ai=ai)
+    game.game_loop()
+
+
+def qlearn_command(args):
+    # With a metrics log, the learning curve is plotted offline by the plot command.
+    if args.actors:
+        from AI_Types.AI_DQL_actor_learner import train_qnet_actor_learner
+        q_net = train_qnet_actor_learner((S_WIDTH, S_HEIGHT), num_actors=args.actors,
+                                         num_episodes=args.episodes, gamma=0.9, eps_end=0,
+                                         eps_decay=0.93, print_learning_curve=args.metrics is None,
+                                         metrics_path=args.metrics)
     else:
-        print("Enter one of the options: save; train; play; ai; q-learn")
+        from AI_Types.AI_DQL import train_qnet
+        q_net = train_qnet((S_WIDTH, S_HEIGHT), num_episodes=args.episodes, gamma=0.9,
+                           eps_end=0, eps_decay=0.93, checkpoint_path=args.checkpoint,
+                           print_learning_curve=args.metrics is None, metrics_path=args.metrics)
 
+    if args.ai:
+        from AI_Types.checkpoint import CHECKPOINT_EXTENSION, save_checkpoint
+        save_checkpoint(q_net, args.ai + CHECKPOINT_EXTENSION)
 
-def save_infos_actions(infos, actions, filename):
-    """
-    Save the given infos and actions to a file using pickle.
 
-    :param infos: The infos to save.
-    :param actions: The actions to save.
-    :param filename: The name of the file to save to.
-    :return: None
-    """
-    with open(filename + ".pickle", 'wb') as f:
-        # Put them in the file
-        pickle.dump((infos, actions), f)
+def neat_command(args):
+    from games.ball_game.ball_game import BallGame
+    from AI_Types.AI_evolution import train_neat
+
+    train_neat(args.config, BallGame, num_generations=args.generations, path_for_ai=args.ai,
+               num_workers=args.workers, seed=args.seed, checkpoint_path=args.checkpoint,
+               metrics_path=args.metrics, game_kwargs={'screen_size': (S_WIDTH, S_HEIGHT),
+                            'headless': args.headless or args.workers > 0})
+
+
+def plot_command(args):
+    from metrics import plot_metrics
+
+    plot_metrics(args.log, args.value, args.window, args.output)
+
+
+def make_parser():
+    parser = argparse.ArgumentParser(description="Play the ball game, record it and train AIs "
+                                                 "to play it.")
+    parser.add_argument('--profile', metavar='PATH',
+                        help="Append the per-phase timings of the training loops to this JSONL "
+                             "file (see instrumentation.py).")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    command = commands.add_parser('save', help="Play and record the gameplay to a dataset.")
+    command.add_argument('dataset', help="The dataset directory.")
+    command.set_defaults(func=save_command)
+
+    command = commands.add_parser('train', help="Train a supervised AI on a dataset.")
+    command.add_argument('dataset', help="The dataset directory.")
+    command.add_argument('ai', help="The AI file, without extension.")
+    command.add_argument('--checkpoint', help="Snapshot file to resume the training from.")
+    command.add_argument('--metrics', help="Metrics log receiving the loss of every epoch.")
+    command.set_defaults(func=train_command)
+
+    command = commands.add_parser('convert', help="Convert a pickled gameplay to a dataset.")
+    command.add_argument('pickle', help="The pickle file, without extension.")
+    command.add_argument('dataset', help="The dataset directory.")
+    command.set_defaults(func=convert_command)
+
+    command = commands.add_parser('convert_ai', help="Convert a pickled AI to a checkpoint.")
+    command.add_argument('pickle', help="The pickle file, without extension.")
+    command.add_argument('ai', help="The checkpoint file, without extension.")
+    command.set_defaults(func=convert_ai_command)
+
+    command = commands.add_parser('play', help="Play the game.")
+    command.set_defaults(func=play_command)
+
+    command = commands.add_parser('ai', help="Watch an AI play the game.")
+    command.add_argument('ai', help="The AI file, without extension.")
+    command.set_defaults(func=ai_command)
+
+    command = commands.add_parser('qlearn', help="Train a deep Q-network.")
+    command.add_argument('--episodes', type=int, default=30)
+    command.add_argument('--ai', help="Where to save the trained network, without extension.")
+    group = command.add_mutually_exclusive_group()
+    group.add_argument('--checkpoint', help="Snapshot file to resume the training from.")
+    group.add_argument('--actors', type=int, default=0,
+                       help="Play in this many actor processes while this one learns "
+                            "(vector games, no snapshots).")
+    command.add_argument('--metrics', help="Metrics log receiving the points of every episode "
+                                           "(instead of plotting them when training is over).")
+    command.set_defaults(func=qlearn_command)
+
+    command = commands.add_parser('NEAT', help="Evolve a NEAT population.")
+    command.add_argument('ai', help="Where to save the best network, without extension.")
+    command.add_argument('config', help="The NEAT configuration file.")
+    command.add_argument('--generations', type=int, default=300)
+    command.add_argument('--workers', type=int, default=0,
+                         help="Worker processes evaluating the genomes (their games are "
+                              "headless).")
+    command.add_argument('--seed', type=int)
+    command.add_argument('--headless', action='store_true', help="Do not show the games.")
+    command.add_argument('--checkpoint', help="Snapshot file to resume the evolution from.")
+    command.add_argument('--metrics', help="Metrics log receiving the fitness statistics of "
+                                           "every generation.")
+    command.set_defaults(func=neat_command)
+
+    command = commands.add_parser('plot', help="Plot a metrics log of a training.")
+    command.add_argument('log', help="The metrics log.")
+    command.add_argument('--value', help="The value to plot (the first one of the log by "
+                                         "default).")
+    command.add_argument('--window', type=int, default=5, help="Rolling mean window.")
+    command.add_argument('--output', help="Save the plot to this image file instead of "
+                                          "showing it.")
+    command.set_defaults(func=plot_command)
+
+    return parser
+
+
+def main(argv: list[str] | None = None):
+    args = make_parser().parse_args(argv)
+
+    if args.profile:
+        import instrumentation
+        sink = instrumentation.JsonlSink(args.profile)
+        instrumentation.enable(sink)
+        try:
+            args.func(args)
+        finally:
+            instrumentation.disable()
+            sink.close()
+    else:
+        args.func(args)
 
 
 def load_infos_actions(filename):
     """
     Load Infos and Actions from Pickle File
 
-    This method loads the information and action data from a pickle file.
+    This method loads the information and action data from a legacy pickle file (datasets
+    are now recorded with `GameplayWriter`, `convert` turns a pickle into one).
     The pickle file should contain a tuple of two variables: infos and actions.
 
     :param filename: The name of the pickle file to load data from. Do not include the file extension.
@@ -90,19 +224,32 @@ def load_infos_actions(filename):
     return infos, actions
 
 
-def save_ai(infos, actions, filename):
-    ai = train_ai(infos, actions, S_WIDTH, lr=0.01, num_epochs=50, print_cost=True, print_stride=5)
-    with open(filename + ".pickle", 'wb') as f:
-        # Put AI in the file
-        pickle.dump(ai, f)
+def save_ai(infos, actions, filename, checkpoint_path: str | None = None,
+            metrics_path: str | None = None):
+    from AI_Types.AI_supervised import train_ai
+    from AI_Types.checkpoint import CHECKPOINT_EXTENSION, save_checkpoint
 
+    ai = train_ai(infos, actions, S_WIDTH, lr=0.01, num_epochs=50, print_cost=True, print_stride=5,
+                  checkpoint_path=checkpoint_path, metrics_path=metrics_path)
+    save_checkpoint(ai, filename + CHECKPOINT_EXTENSION)
 
-def load_ai(filename):
-    with open(filename + ".pickle", 'rb') as f:
-        # Load AI from the file
-        ai = pickle.load(f)
 
-    return ai
+def load_ai(filename, numpy_only: bool = False):
+    """
+    Load an AI from its checkpoint, or from a legacy pickle when there is no checkpoint
+    (`convert_ai` turns a pickle into a checkpoint).
+
+    :param filename: The name of the AI file. Do not include the file extension.
+    :param numpy_only: Load a supervised / deep Q-learning checkpoint as a `NumpyAI`, which
+            plays without importing torch.
+    :return: The loaded AI.
+    """
+    from AI_Types.checkpoint import CHECKPOINT_EXTENSION, load_checkpoint, load_pickle
+
+    if os.path.exists(filename + CHECKPOINT_EXTENSION):
+        return load_checkpoint(filename + CHECKPOINT_EXTENSION, numpy_only=numpy_only)
+
+    return load_pickle(filename + ".pickle")
 
 
 if __name__ == '__main__':
@@ -0,0 +1,204 @@
+"""
+Columnar on-disk format for recorded gameplay.
+
+A dataset is a directory holding:
+    meta.json   - the format version and the number of state features.
+    infos.f32   - raw float32 rows of states (train_X).
+    actions.u8  - raw uint8 actions (train_Y).
+
+The number of rows comes from the file sizes, so writing only ever appends to the files and
+reading memory-maps them without loading anything.
+"""
+
+import os
+import json
+import queue
+import threading
+import numpy as np
+
+FORMAT_VERSION = 1
+META_FILE = 'meta.json'
+INFOS_FILE = 'infos.f32'
+ACTIONS_FILE = 'actions.u8'
+
+
+class GameplayWriter:
+    """
+    Append-only writer of a gameplay dataset. Rows are buffered in a fixed-size chunk and
+    written to disk whenever the chunk fills, on `flush` and on `close`.
+
+    Args:
+        path (str): The dataset directory, created if needed. Existing datasets are appended to.
+        state_features (int): Number of features of a state.
+        chunk_size (int): Number of rows buffered in memory.
+    """
+
+    def __init__(self, path: str, state_features: int, chunk_size: int = 4096):
+        os.makedirs(path, exist_ok=True)
+        meta_path = os.path.join(path, META_FILE)
+        if os.path.exists(meta_path):
+            meta = read_meta(path)
+            if meta['state_features'] != state_features:
+                raise ValueError(f"Dataset {path} has {meta['state_features']} state features, "
+                                 f"not {state_features}.")
+        else:
+            with open(meta_path, 'w') as f:
+                json.dump({'version': FORMAT_VERSION, 'state_features': state_features}, f)
+
+        self.path = path
+        self.state_features = state_features
+        self.infos_file = open(os.path.join(path, INFOS_FILE), 'ab')
+        self.actions_file = open(os.path.join(path, ACTIONS_FILE), 'ab')
+
+        self.infos = np.empty((chunk_size, state_features), dtype=np.float32)
+        self.actions = np.empty(chunk_size, dtype=np.uint8)
+        self.count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def append(self, info, action: int):
+        self.infos[self.count] = info
+        self.actions[self.count] = action
+        self.count += 1
+        if self.count == len(self.actions):
+            self.flush()
+
+    def extend(self, infos, actions):
+        self.flush()
+        self._write(np.asarray(infos, dtype=np.float32), np.asarray(actions, dtype=np.uint8))
+
+    def flush(self):
+        if self.count:
+            self._write(self.infos[:self.count], self.actions[:self.count])
+            self.count = 0
+        self.infos_file.flush()
+        self.actions_file.flush()
+
+    def _write(self, infos: np.ndarray, actions: np.ndarray):
+        # Actions last, a row counts only once both of its columns are on disk.
+        self.infos_file.write(np.ascontiguousarray(infos).tobytes())
+        self.actions_file.write(np.ascontiguousarray(actions).tobytes())
+
+    def close(self):
+        if not self.infos_file.closed:
+            self.flush()
+            self.infos_file.close()
+            self.actions_file.close()
+
+
+class StreamingRecorder:
+    """
+    Records frames into fixed-size chunks and passes full chunks to a sink on a background
+    thread, so the game never waits on disk. Chunks come from a fixed pool that the writer
+    thread recycles: when the sink falls behind and all the chunks are pending, `append`
+    blocks, which bounds the memory of a recording of any length.
+
+    Args:
+        sink: Called on the writer thread with (infos, actions) arrays of every chunk, like
+                `GameplayWriter.extend`. The arrays are reused afterwards, a sink that keeps
+                them (e.g. puts them in a queue) must copy them.
+        state_features (int): Number of features of a state.
+        chunk_size (int): Number of rows in a chunk.
+        max_pending_chunks (int): Number of full chunks that may wait for the sink.
+    """
+
+    def __init__(self, sink, state_features: int, chunk_size: int = 4096,
+                 max_pending_chunks: int = 4):
+        self.sink = sink
+        self.free_chunks = queue.Queue()
+        for _ in range(max_pending_chunks + 1):
+            self.free_chunks.put((np.empty((chunk_size, state_features), dtype=np.float32),
+                                  np.empty(chunk_size, dtype=np.uint8)))
+        self.full_chunks = queue.Queue()
+        self.error = None
+
+        self.infos, self.actions = self.free_chunks.get()
+        self.count = 0
+        self.thread = threading.Thread(target=self._write_chunks, daemon=True)
+        self.thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def append(self, info, action: int):
+        self.infos[self.count] = info
+        self.actions[self.count] = action
+        self.count += 1
+        if self.count == len(self.actions):
+            self.flush()
+
+    def flush(self):
+        """
+        Hand the current chunk to the writer thread (does not wait for it to be written).
+        """
+
+        if self.error is not None:
+            raise self.error
+        if self.count:
+            self.full_chunks.put((self.infos, self.actions, self.count))
+            self.infos, self.actions = self.free_chunks.get()
+            self.count = 0
+
+    def close(self):
+        """
+        Write the remaining frames and stop the writer thread.
+        """
+
+        if self.thread.is_alive():
+            self.flush()
+            self.full_chunks.put(None)
+            self.thread.join()
+        if self.error is not None:
+            raise self.error
+
+    def _write_chunks(self):
+        while (chunk := self.full_chunks.get()) is not None:
+            infos, actions, count = chunk
+            try:
+                if self.error is None:
+                    self.sink(infos[:count], actions[:count])
+            except Exception as e:
+                self.error = e
+            self.free_chunks.put((infos, actions))
+
+
+def read_meta(path: str):
+    with open(os.path.join(path, META_FILE)) as f:
+        meta = json.load(f)
+
+    if meta['version'] != FORMAT_VERSION:
+        raise ValueError(f"Unsupported gameplay dataset version {meta['version']}.")
+
+    return meta
+
+
+def load_gameplay(path: str):
+    """
+    Memory-map a gameplay dataset. Pages are read from disk only when rows are accessed, and
+    the arrays are copy-on-write, so they can be handed to `torch.from_numpy`.
+
+    :param path: The dataset directory.
+    :return: The infos (num_rows, state_features) float32 and the actions (num_rows,) uint8.
+    """
+
+    state_features = read_meta(path)['state_features']
+    infos_path = os.path.join(path, INFOS_FILE)
+    actions_path = os.path.join(path, ACTIONS_FILE)
+
+    # A row cut by an interrupted write is ignored.
+    num_rows = min(os.path.getsize(infos_path) // (4 * state_features),
+                   os.path.getsize(actions_path))
+    if num_rows == 0:
+        return np.empty((0, state_features), dtype=np.float32), np.empty(0, dtype=np.uint8)
+
+    infos = np.memmap(infos_path, np.float32, 'c', shape=(num_rows, state_features))
+    actions = np.memmap(actions_path, np.uint8, 'c', shape=(num_rows,))
+
+    return infos, actions
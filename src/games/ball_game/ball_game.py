@@ -4,6 +4,8 @@
 
 import pygame
 from games.ball_game.ball_game_sprites import Player, Ball
+from time import perf_counter
+from instrumentation import PROFILER, timer
 
 # Define some colors.
 GREY = (128, 128, 128)
@@ -30,10 +32,16 @@ class BallGame:
 
     Args:
         screen_size (tuple[int, int]): Size of the game screen.
+        collect_data (bool): Whether to record the frames for supervised training.
+        data_writer: Where to append the recorded frames (a `GameplayWriter` or a
+                `StreamingRecorder`). When None, they are kept in memory until `get_data`.
+        headless (bool): Never open a viewer, even when a game asks to be shown. A headless game
+                does not touch the pygame display, event queue or keyboard state.
 
     Methods:
         __init__(self, screen_size: tuple[int, int], game_speed=0.1, ai: AI = None)
         reset(self, title: str = 'Ball Game', human_player: bool = True, collect_data: bool = False)
+        attach_viewer(self, game_name: str, game_title: str = 'Ball Game')
         kill(self)
         __game_loop(self)
         __game_frame(self, direction: str = None) -> tuple
@@ -48,13 +56,14 @@ class BallGame:
     NUM_ACTIONS = 3
 
     def __init__(self, screen_size: tuple[int, int] = (800, 600),
-                 collect_data: bool = False):
+                 collect_data: bool = False, headless: bool = False, data_writer=None):
         """
         The `__init__` method initializes an instance of the `ball_game` class.
+        Pygame itself is initialized only once a viewer is attached.
 
         """
 
-        pygame.init()
+        self.headless = headless
         self.game_list = []
         self.screen_size = screen_size
 
@@ -70,6 +79,7 @@ class BallGame:
 
         self.win_or_loses = {}  # Win or lose state flag
         self.collect_data = collect_data  # Data collection flag.
+        self.data_writer = data_writer  # Recorded frames destination.
         self.displayed_game = None  # None displayed game at the moment.
 
         # Initialize the screen variable.
@@ -81,13 +91,6 @@ class BallGame:
         """
         """
 
-        if show_game:
-            if self.screen is None:
-                self.screen = pygame.display.set_mode(self.screen_size)
-            self.displayed_game = game_name
-            pygame.display.set_caption(game_title)
-            self.screen.fill(GREY)
-
         if game_name not in self.game_list:
             self.__initialize_game(game_name, game_speed)
 
@@ -100,9 +103,27 @@ class BallGame:
         self.save_fitnesses[game_name] = save_fitness  # Save the flag
         self.fitnesses[game_name] = 0
 
-        # Add game features.
-        if show_game:
-            pygame.display.flip()
+        if show_game and not self.headless:
+            self.attach_viewer(game_name, game_title)
+
+    def attach_viewer(self, game_name: str, game_title: str = "Ball Game"):
+        """
+        Open the game window (initializing pygame on first use) and display the given game.
+
+        :param game_name: The game to display.
+        :param game_title: The window caption.
+        :return: None
+        """
+
+        if self.screen is None:
+            pygame.init()
+            self.screen = pygame.display.set_mode(self.screen_size)
+        self.displayed_game = game_name
+        pygame.display.set_caption(game_title)
+        self.screen.fill(GREY)
+        self.players[game_name].draw(self.screen)
+        self.balls[game_name].draw(self.screen)
+        pygame.display.flip()
 
     def __initialize_game(self, game_name: str, game_speed: float = 0.5):
         self.players[game_name] = Player(self.screen_size, BLUE, game_speed)
@@ -149,7 +170,8 @@ class BallGame:
         """
         Determine the direction for the player to move.
         If an existing direction is given, use that. If an AI is present, use the AI's prediction.
-        Otherwise, no direction is returned.
+        Otherwise, no direction is returned (keyboard control) when a viewer is attached, and the
+        player stays still when it is not.
 
         :param existing_direction: The current direction if exists
         :return: The direction for the player to move.
@@ -158,47 +180,65 @@ class BallGame:
             return existing_direction
         elif self.agents[game] is not None:
             info = self.get_state(game)
-            return _ACTION_DECODER[self.agents[game].predict(info)]
+            with timer('policy.act'):
+                action = self.agents[game].predict(info)
+            return _ACTION_DECODER[action]
+        elif self.screen is None:
+            return 'still'
         else:
             return None
 
     def __game_frame(self, game: str, direction: str | None = None):
         """
-        Execute a single game frame. Check for QUIT event,  process player and ball movements,
-        update the display, and check for win or loss.
+        Execute a single game frame. Check for QUIT event (when a viewer is attached), process
+        player and ball movements, update the display, and check for win or loss.
 
         :param direction: A specific direction to move. If None, direction will be determined by AI
                 or no movement.
         :return: The game state, the direction of movement, and the result of the game (win, lose,
                 or continue).
         """
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                self.kill()
-                exit()
+        if self.screen is not None:
+            with timer('env.events'):
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT:
+                        self.kill()
+                        exit()
 
         # Single frame logic.
         info = self.get_state(game)
         if self.win_or_loses[game] == GameResultType.WIN:  # Handle win condition.
             self.balls[game].reset()
         direction = self.__get_direction(game, direction)
+        # Timed without a context manager, whose cost shows on a frame this short.
+        profiling = PROFILER.enabled
+        if profiling:
+            start = perf_counter()
         # Save direction again here because Player.move() handles keyboard interaction.
         direction = self.players[game].move(direction)
         self.balls[game].move()
         self.win_or_loses[game] = self.balls[game].check_win_or_loss(self.players[game])
+        if profiling:
+            PROFILER.record('env.step', perf_counter() - start)
 
         # Single frame graphics
         if game is self.displayed_game:
-            self.screen.fill(GREY)
-            self.players[game].draw(self.screen)
-            self.balls[game].draw(self.screen)
-            pygame.display.flip()
+            with timer('env.render'):
+                self.screen.fill(GREY)
+                self.players[game].draw(self.screen)
+                self.balls[game].draw(self.screen)
+                pygame.display.flip()
 
         return info, direction
 
     def __collect_data(self, info: list[float, float], direction: str):
-        self.infos.append((info[0] / self.screen_size[0], info[1] / self.screen_size[0]))
-        self.actions.append(_ACTION_ENCODER[direction])
+        # The state is already normalized by `get_state`.
+        info = (info[0], info[1])
+        if self.data_writer is not None:
+            self.data_writer.append(info, _ACTION_ENCODER[direction])
+        else:
+            self.infos.append(info)
+            self.actions.append(_ACTION_ENCODER[direction])
 
     def make_action(self, game_name: str, action: int):
         # Decode the action to a direction
@@ -155,9 +155,8 @@ class Ball(pygame.sprite.Sprite):
         self.speed = speed
         self.s_width, self.s_height = screen_size
         self.radius = self.s_width // 40
-        self.image = pygame.Surface((self.radius * 2, self.radius * 2), pygame.SRCALPHA)
-        pygame.draw.circle(self.image, self.color, (self.radius, self.radius), self.radius)
-        self.rect = self.image.get_rect()
+        self.image = None  # Rendered on the first draw, simulation only needs the rect.
+        self.rect = pygame.Rect(0, 0, self.radius * 2, self.radius * 2)
         self.floaty = 0
         self.reset()
 
@@ -170,6 +169,9 @@ class Ball(pygame.sprite.Sprite):
         return self.rect.centerx
 
     def draw(self, surface: pygame.Surface):
+        if self.image is None:
+            self.image = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+            pygame.draw.circle(self.image, self.color, (self.radius, self.radius), self.radius)
         surface.blit(self.image, self.rect)
 
     def move(self):
@@ -0,0 +1,153 @@
+"""
+Vectorized version of the ball game.
+
+Every game is a row in a set of structure-of-arrays NumPy buffers, so stepping N games costs a
+handful of array operations instead of N Python-level frames.
+"""
+
+import numpy as np
+from games.vector_env import VectorEnv
+
+_ACTION_SIGNS = np.array([0., 1., -1.])  # still, right, left
+
+RESULT_CONTINUE = 0
+RESULT_WIN = 1
+RESULT_LOSE = 2
+
+WIN_REWARD = 100.
+LOSE_REWARD = -100.
+
+
+class VectorBallGame(VectorEnv):
+    """
+    N independent ball games advanced together.
+
+    Reproduces the frame logic of `BallGame` (``Player._move_based_on_direction``, ``Ball.move``
+    and ``Ball.check_win_or_loss``) on integer rectangles backed by float positions, so agents
+    trained on one transfer to the other. See `VectorEnv` for the reset semantics.
+
+    Attributes:
+        STATE_FEATURES (int): Number of state features.
+        NUM_ACTIONS (int): Number of possible actions (0 - still, 1 - right, 2 - left).
+
+    Args:
+        num_envs (int): Number of games to run side by side.
+        screen_size (tuple[int, int]): Size of the game screen.
+        game_speed (float): Player speed, the ball falls at half of it (as in `BallGame`).
+        auto_reset (bool): Whether to reset lost games on `step`.
+        seed (int | None): Seed for the ball spawn positions.
+
+    Methods:
+        reset_envs(self, mask: np.ndarray)
+        step_envs(self, actions: np.ndarray) -> tuple[np.ndarray, np.ndarray]
+        get_states(self) -> np.ndarray
+        get_rewards(self) -> np.ndarray
+        is_lose(self) -> np.ndarray
+    """
+    STATE_FEATURES = 2
+    NUM_ACTIONS = 3
+
+    def __init__(self, num_envs: int, screen_size: tuple[int, int] = (800, 600),
+                 game_speed: float = .5, auto_reset: bool = True, seed: int | None = None):
+        super().__init__(num_envs, auto_reset, seed)
+        self.s_width, self.s_height = screen_size
+        self.player_speed = game_speed
+        self.ball_speed = game_speed / 2
+
+        # Sprite geometry (same as `Player` and `Ball`).
+        self.player_width, self.player_height = self.s_width // 10, self.s_height // 30
+        self.player_start_x = self.s_width // 2 - self.player_width // 2
+        self.player_y = self.s_height - self.player_height
+        self.ball_radius = self.s_width // 40
+        self.ball_size = self.ball_radius * 2
+
+        # Structure-of-arrays state.
+        self.player_floatx = np.empty(num_envs, dtype=np.float64)
+        self.player_x = np.empty(num_envs, dtype=np.int64)
+        self.ball_x = np.empty(num_envs, dtype=np.int64)
+        self.ball_floaty = np.empty(num_envs, dtype=np.float64)
+        self.ball_y = np.empty(num_envs, dtype=np.int64)
+        self.results = np.empty(num_envs, dtype=np.int8)
+
+        self.reset()
+
+    def reset_envs(self, mask: np.ndarray):
+        self.player_floatx[mask] = self.player_start_x
+        self.player_x[mask] = self.player_start_x
+        self._reset_balls(mask)
+        self.results[mask] = RESULT_CONTINUE
+
+    def _reset_balls(self, mask: np.ndarray):
+        envs = np.flatnonzero(mask)
+        if envs.size == 0:
+            return
+
+        # Ball center is drawn from range(radius, width - radius), like `Ball.reset`.
+        centers = self.draw(envs, 'integers', self.ball_radius, self.s_width - self.ball_radius)
+        self.ball_x[envs] = centers - self.ball_radius
+        self.ball_floaty[envs] = 0.
+        self.ball_y[envs] = 0
+
+    def step_envs(self, actions: np.ndarray):
+        active = self.results != RESULT_LOSE
+
+        # A ball that was caught on the previous frame respawns before this frame starts.
+        self._reset_balls(self.results == RESULT_WIN)
+
+        # Player movement, blocked on the screen edges (`Player._move_based_on_direction`).
+        moves = _ACTION_SIGNS[actions]
+        can_move = np.where(moves > 0, self.player_x + self.player_width < self.s_width,
+                            self.player_x > 0)
+        self.player_floatx += moves * (self.player_speed * (can_move & active))
+        np.copyto(self.player_x, self.player_floatx, casting='unsafe')
+
+        # Falling ball (`Ball.move`).
+        self.ball_floaty += self.ball_speed * active
+        np.copyto(self.ball_y, self.ball_floaty, casting='unsafe')
+
+        # `Ball.check_win_or_loss`: catching the ball beats touching the floor.
+        win = ((self.ball_x < self.player_x + self.player_width) &
+               (self.player_x < self.ball_x + self.ball_size) &
+               (self.ball_y < self.player_y + self.player_height) &
+               (self.player_y < self.ball_y + self.ball_size))
+        lose = self.ball_y + self.ball_size >= self.s_height
+        results = np.where(win, RESULT_WIN, np.where(lose, RESULT_LOSE, RESULT_CONTINUE))
+        rewards = self.get_rewards(results) * active
+        self.results[active] = results[active]
+
+        return rewards, self.is_lose()
+
+    def get_states(self):
+        """
+        :return: Array of shape (num_envs, STATE_FEATURES) with the player and ball centers
+                normalized by the screen width (same as `BallGame.get_state`).
+        """
+
+        states = np.empty((self.num_envs, self.STATE_FEATURES), dtype=np.float32)
+        states[:, 0] = self.player_x + self.player_width // 2
+        states[:, 1] = self.ball_x + self.ball_radius
+        states /= self.s_width
+
+        return states
+
+    def get_rewards(self, results: np.ndarray | None = None):
+        """
+        Same rewards as `BallGame.get_reward`, for every game.
+
+        :param results: Results to reward, the current results if None.
+        :return: Array of shape (num_envs,) with the rewards.
+        """
+
+        if results is None:
+            results = self.results
+
+        distances = np.abs((self.player_x + self.player_width // 2) -
+                           (self.ball_x + self.ball_radius)) / self.s_width
+        rewards = 1 / (0.25 + distances)
+        rewards[results == RESULT_WIN] = WIN_REWARD
+        rewards[results == RESULT_LOSE] = LOSE_REWARD
+
+        return rewards
+
+    def is_lose(self):
+        return self.results == RESULT_LOSE
@@ -3,99 +3,236 @@ This is my attempt at re-creating the iconic flappy bird game which took
 the internet by storm in early 2013.
 """
 
+import os
 import pygame
 from setup.constants import *
+from setup.physics import round_half_away
 import random
+from collections.abc import Mapping
+import numpy as np
+
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets')
+BIRD_FRAME_FILES = ('bird_down.png', 'bird_mid.png', 'bird_up.png')
+ROTATION_STEP = 3  # Bird rotations are cached at multiples of this angle (degrees).
+
+# Process-wide caches, filled by the first game that renders / plays sounds.
+_ASSETS = {}
+_SOUNDS = {}
+_ROTATED_BIRDS = {}
+
+
+class BirdValues(Mapping):
+    """
+    Read-only view by bird name of a per-bird array of a `FlappyBird`, e.g. its `fitnesses`.
+
+    Args:
+        game (FlappyBird): The game holding the array.
+        attribute (str): The name of the array attribute (arrays grow as birds are added).
+    """
+
+    def __init__(self, game, attribute: str):
+        self.game = game
+        self.attribute = attribute
+
+    def __getitem__(self, name):
+        return getattr(self.game, self.attribute)[self.game.bird_slots[name]].item()
+
+    def __iter__(self):
+        return iter(self.game.bird_names)
+
+    def __len__(self):
+        return len(self.game.bird_names)
+
+
+def load_assets():
+    """
+    Load, scale and convert the images and the font once per process (needs the display).
+
+    :return: Dict of the game surfaces and font by name.
+    """
+
+    if _ASSETS:
+        return _ASSETS
+
+    def load_image(*path, alpha=False):
+        image = pygame.image.load(os.path.join(ASSETS_DIR, *path))
+        return image.convert_alpha() if alpha else image.convert()
+
+    pipe_sprite = pygame.transform.scale2x(load_image('sprites', 'pipe.png'))
+    _ASSETS.update(
+        game_icon=load_image('scene', 'gameicon.png', alpha=True),
+        background_scene=pygame.transform.scale(load_image('scene', 'background.png'),
+                                                (WIDTH, HEIGHT)),
+        floor_scene=pygame.transform.scale2x(load_image('scene', 'floor.png')),
+        game_font=pygame.font.Font(os.path.join(ASSETS_DIR, 'fonts', 'flappy.ttf'), 40),
+        bird_frames=[pygame.transform.scale2x(load_image('sprites', file_name, alpha=True))
+                     for file_name in BIRD_FRAME_FILES],
+        gameover_scene=pygame.transform.scale2x(load_image('scene', 'onset.png', alpha=True)),
+        pipe_sprite=pipe_sprite,
+        flipped_pipe_sprite=pygame.transform.flip(pipe_sprite, False, True))
+
+    return _ASSETS
+
+
+def load_sounds():
+    """
+    Load the sound effects once per process.
+
+    :return: Dict of the sounds by name, empty when there is no audio device.
+    """
+
+    if not _SOUNDS and pygame.mixer.get_init():
+        for name in ('flap', 'clash', 'score'):
+            _SOUNDS[name] = pygame.mixer.Sound(os.path.join(ASSETS_DIR, 'sounds', f'{name}.ogg'))
+
+    return _SOUNDS
+
+
+def get_rotated_bird(frame_index: int, angle: float):
+    """
+    :return: The bird frame rotated by the angle rounded to ``ROTATION_STEP``, rotated once per
+            process.
+    """
+
+    key = (frame_index, int(round(angle / ROTATION_STEP)))
+    if key not in _ROTATED_BIRDS:
+        _ROTATED_BIRDS[key] = pygame.transform.rotozoom(
+            _ASSETS['bird_frames'][frame_index], key[1] * ROTATION_STEP, 1)
+
+    return _ROTATED_BIRDS[key]
 
 
 class FlappyBird:
-    def __init__(self):
-        # Pygame Initialisation
-        pygame.init()
-        self.win = pygame.display.set_mode((WIDTH, HEIGHT))
+    """
+    The flappy bird game for any number of birds (players or AI agents) sharing the pipes.
+
+    The simulation advances in fixed steps counted by a frame counter: pipes spawn every
+    ``SPAWNPIPE_FRAMES`` frames and the birds flap their wings every ``BIRD_FLAP_FRAMES``
+    frames, and AI agents act on every frame. Runs are reproducible for a given seed, and
+    without rendering the game runs as fast as the CPU allows.
+
+    The birds live in NumPy arrays indexed by their slot (`bird_slots`), so physics, collision
+    and scoring are computed for the whole population at once. `scores`, `fitnesses` and
+    `games_active` are views of these arrays by bird name. Every frame, the states of all the
+    birds are gathered into one array, and birds controlled by a batched policy (`set_policy`)
+    get their actions from a single `predict` call.
+
+    Images, the font and sounds are loaded once per process and shared by all the games.
+    Without rendering, no window is opened and nothing is loaded, drawn or played.
+
+    Args:
+        render (bool): Whether to draw the game and hold it at ``FPS`` frames per second.
+        seed (int | None): Seed for the bird spawn heights and the pipe heights.
+        mute (bool): Whether to play the game without sound effects.
+    """
+
+    def __init__(self, render: bool = True, seed: int | None = None, mute: bool = False):
+        self.render = render
+        self.rng = random.Random(seed)
+        self.frame = 0
+        self.sounds = {}
+
         self.bird_names = []
         self.agent_names = self.bird_names
-        self.scores = {}
-        self.fitnesses = {}
+        self.bird_slots = {}
         self.high_score = 0
-        self.cans_score = {}
-        self.games_active = {}
         self.ai_agents = {}
-
-        pygame.display.set_caption("Flappy Bird")
-        gameicon = pygame.image.load('assets/scene/gameicon.png').convert_alpha()
-        pygame.display.set_icon(gameicon)
-        self.clock = pygame.time.Clock()
-
-        # Rendering game scene
-        background_scene = pygame.image.load('assets/scene/background.png').convert()
-        self.background_scene = pygame.transform.scale(background_scene, (WIDTH, HEIGHT))
-        floor_scene = pygame.image.load('assets/scene/floor.png').convert()
-        self.floor_scene = pygame.transform.scale2x(floor_scene)
-
-        # Loading fonts
-        self.game_font = pygame.font.Font('assets/fonts/flappy.ttf', 40)
-
-        # Loading bird sprites
-        bird_downflap = pygame.transform.scale2x(
-            pygame.image.load('assets/sprites/bird_down.png').convert_alpha())
-        bird_midflap = pygame.transform.scale2x(
-            pygame.image.load('assets/sprites/bird_mid.png').convert_alpha())
-        bird_upflap = pygame.transform.scale2x(
-            pygame.image.load('assets/sprites/bird_up.png').convert_alpha())
-        self.bird_frames = [bird_downflap, bird_midflap, bird_upflap]
-        self.bird_indexes = {}
-        self.bird_sprites = {}
-        self.rotated_bird_sprites = {}
-        self.bird_hitboxes = {}
-        self.bird_velocities = {}
-
-        # Loading game sounds
-        self.flap_sound = pygame.mixer.Sound('assets/sounds/flap.ogg')
-        self.clash_sound = pygame.mixer.Sound('assets/sounds/clash.ogg')
-        self.score_sound = pygame.mixer.Sound('assets/sounds/score.ogg')
-
-        # Game-over scene
-        gameover_scene = pygame.image.load('assets/scene/onset.png').convert_alpha()
-        self.gameover_scene = pygame.transform.scale2x(gameover_scene)
-        self.gameover_rect = self.gameover_scene.get_rect(center=(262, 400))
-
-        # Drawing pipe obstacles
-        pipe_sprite = pygame.image.load('assets/sprites/pipe.png').convert()
-        self.pipe_sprite = pygame.transform.scale2x(pipe_sprite)
+        self.policy = None
+        self.policy_slots = np.zeros(0, dtype=np.int64)
+
+        # Bird population, a slot per bird.
+        self.bird_y = np.zeros(0, dtype=np.int64)
+        self.bird_velocities = np.zeros(0, dtype=np.float64)
+        self.bird_indexes = np.zeros(0, dtype=np.int64)
+        self.alive = np.zeros(0, dtype=bool)
+        self.cans_score = np.zeros(0, dtype=bool)
+        self.bird_scores = np.zeros(0, dtype=np.int64)
+        self.bird_fitnesses = np.zeros(0, dtype=np.int64)
+        self.scores = BirdValues(self, 'bird_scores')
+        self.fitnesses = BirdValues(self, 'bird_fitnesses')
+        self.games_active = BirdValues(self, 'alive')
+
+        self.bird_width, self.bird_height = BIRD_SIZE
         self.pipe_list = []
-        self.SPAWNPIPE = pygame.USEREVENT
-        pygame.time.set_timer(self.SPAWNPIPE, 1500)
 
-        # Bird flap event
-        self.BIRD_FLAP = pygame.USEREVENT + 1
-        pygame.time.set_timer(self.BIRD_FLAP, 200)
+        if render:
+            # Pygame Initialisation
+            pygame.init()
+            self.win = pygame.display.set_mode((WIDTH, HEIGHT))
+            self.clock = pygame.time.Clock()
+            assets = load_assets()
+            pygame.display.set_caption("Flappy Bird")
+            pygame.display.set_icon(assets['game_icon'])
+
+            self.background_scene = assets['background_scene']
+            self.floor_scene = assets['floor_scene']
+            self.game_font = assets['game_font']
+            self.bird_frames = assets['bird_frames']
+            self.gameover_scene = assets['gameover_scene']
+            self.gameover_rect = self.gameover_scene.get_rect(center=(262, 400))
+            self.pipe_sprite = assets['pipe_sprite']
+            self.flipped_pipe_sprite = assets['flipped_pipe_sprite']
+
+            if not mute:
+                self.sounds = load_sounds()
 
     def reset_game(self, name: int | str = "FlappyBird", ai=None):
 
-        if name not in self.bird_names:
+        if name not in self.bird_slots:
+            self.bird_slots[name] = len(self.bird_names)
             self.bird_names.append(name)
+            self.add_bird_slot()
+
+        i = self.bird_slots[name]
         self.ai_agents[name] = ai
-        self.scores[name] = 0
-        self.fitnesses[name] = 0
-        self.cans_score[name] = True
-        self.games_active[name] = True
-        self.bird_indexes[name] = 0
-        self.bird_sprites[name] = self.bird_frames[self.bird_indexes[name]]
-        self.rotated_bird_sprites[name] = self.bird_frames[self.bird_indexes[name]]
-        self.bird_hitboxes[name] = self.bird_sprites[name].get_rect(
-            center=(100, random.gauss(400, 100)))
-        self.bird_velocities[name] = 0
+        self.bird_scores[i] = 0
+        self.bird_fitnesses[i] = 0
+        self.cans_score[i] = True
+        self.alive[i] = True
+        self.bird_indexes[i] = 0
+        self.bird_y[i] = round_half_away(self.rng.gauss(400, 100))
+        self.bird_velocities[i] = 0
+
+    def add_bird_slot(self):
+        for attribute in ('bird_y', 'bird_velocities', 'bird_indexes', 'alive', 'cans_score',
+                          'bird_scores', 'bird_fitnesses'):
+            array = getattr(self, attribute)
+            setattr(self, attribute, np.append(array, np.zeros(1, dtype=array.dtype)))
+
+    def set_policy(self, policy, bird_names: list):
+        """
+        Control birds with a batched policy, such as a `BatchedFeedForwardNetwork` or an `AI`
+        (through `predict_batch`).
+
+        :param policy: Has a `predict` method mapping an array of states (a row per bird) to an
+                array of actions (0 - flap, 1 - do nothing). None removes the policy.
+        :param bird_names: The names of the birds the policy controls, in the order of its rows.
+        """
+
+        self.policy = policy
+        self.policy_slots = np.array([self.bird_slots[name] for name in bird_names],
+                                     dtype=np.int64)
 
     def get_state(self, bird_name):
-        state = [self.bird_hitboxes[bird_name].centery / HEIGHT,
-                 self.bird_velocities[bird_name] / 6]
+        i = self.bird_slots[bird_name]
+        state = [self.bird_y[i].item() / HEIGHT, self.bird_velocities[i].item() / 6]
+        state.append(self.get_pipe_state())
+        return state
 
-        pipe_state = (self.pipe_list[0].bottom + self.pipe_list[1].top)/(2 * HEIGHT) \
-            if len(self.pipe_list) >= 2 else 0.5
+    def get_states(self):
+        """
+        :return: Array of shape (number of birds, 3), the `get_state` of every bird slot.
+        """
 
-        state.append(pipe_state)
-        return state
+        states = np.empty((len(self.bird_names), 3))
+        states[:, 0] = self.bird_y / HEIGHT
+        states[:, 1] = self.bird_velocities / 6
+        states[:, 2] = self.get_pipe_state()
+        return states
+
+    def get_pipe_state(self):
+        return (self.pipe_list[0].bottom + self.pipe_list[1].top)/(2 * HEIGHT) \
+            if len(self.pipe_list) >= 2 else 0.5
 
     # Drawing dynamic floor
     def draw_floor(self):
@@ -104,9 +241,11 @@ class FlappyBird:
 
     # Drawing new pipe
     def create_pipe(self):
-        random_pipe = random.choice(PIPE_HEIGHT)
-        bottom_pipe = self.pipe_sprite.get_rect(midtop=(700, random_pipe))
-        top_pipe = self.pipe_sprite.get_rect(midbottom=(700, random_pipe - 250))
+        random_pipe = self.rng.choice(PIPE_HEIGHT)
+        bottom_pipe = pygame.Rect((0, 0), PIPE_SIZE)
+        bottom_pipe.midtop = (700, random_pipe)
+        top_pipe = pygame.Rect((0, 0), PIPE_SIZE)
+        top_pipe.midbottom = (700, random_pipe - 250)
         return bottom_pipe, top_pipe
 
     # Dynamic obstacles
@@ -121,39 +260,41 @@ class FlappyBird:
             if pipe.bottom >= 800:
                 self.win.blit(self.pipe_sprite, pipe)
             else:
-                flip_pipe = pygame.transform.flip(self.pipe_sprite, False, True)
-                self.win.blit(flip_pipe, pipe)
+                self.win.blit(self.flipped_pipe_sprite, pipe)
 
     # Collision detection
-    def check_collision(self, bird_name):
-        for pipe in self.pipe_list:
-            if self.bird_hitboxes[bird_name].colliderect(pipe):
-                self.clash_sound.play()
-                #pygame.time.delay(300)
-                self.cans_score[bird_name] = True
-                return False
-        if self.bird_hitboxes[bird_name].top <= -150 or self.bird_hitboxes[bird_name].bottom >= 700:
-            self.clash_sound.play()
-            #pygame.time.delay(300)
-            self.cans_score[bird_name] = True
-            return False
-        return True
+    def check_collision(self):
+        """
+        :return: Boolean array, which birds hit a pipe, the ceiling or the floor.
+        """
+
+        bird_tops = self.bird_y - self.bird_height // 2
+        bird_bottoms = bird_tops + self.bird_height
+        bird_left = BIRD_X - self.bird_width // 2
+        collisions = (bird_tops <= CEILING) | (bird_bottoms >= FLOOR_Y)
+
+        if self.pipe_list:
+            pipes = np.array([(pipe.left, pipe.right, pipe.top, pipe.bottom)
+                              for pipe in self.pipe_list])
+            lefts, rights, tops, bottoms = pipes.T
+            horizontal = (lefts < bird_left + self.bird_width) & (bird_left < rights)
+            collisions |= (horizontal & (tops < bird_bottoms[:, None]) &
+                           (bird_tops[:, None] < bottoms)).any(axis=1)
+
+        return collisions
 
     # Animating bird
-    def rotate_bird(self, bird_name):
-        self.rotated_bird_sprites[bird_name] = pygame.transform.rotozoom(
-            self.bird_sprites[bird_name], -self.bird_velocities[bird_name] * 3, 1)
+    def rotate_bird(self, i: int):
+        return get_rotated_bird(self.bird_indexes[i], -self.bird_velocities[i] * 3)
 
-    # Bird flap animation
-    def bird_animation(self, bird_name):
-        self.bird_sprites[bird_name] = self.bird_frames[self.bird_indexes[bird_name]]
-        self.bird_hitboxes[bird_name] = self.bird_sprites[bird_name].get_rect(
-            center=(100, self.bird_hitboxes[bird_name].centery))
+    def play_sound(self, name: str):
+        if name in self.sounds:
+            self.sounds[name].play()
 
     # Current game score
     def score_display(self):
         global WHITE
-        if any(self.games_active.values()):
+        if self.alive.any():
             score_surface = self.game_font.render(str(int(max(self.scores.values()))), True, WHITE)
             score_rect = score_surface.get_rect(center=(262, 100))
             self.win.blit(score_surface, score_rect)
@@ -174,108 +315,150 @@ class FlappyBird:
         self.high_score = max(self.scores.values()) if max(self.scores.values()) > self.high_score \
             else self.high_score
 
-    # Enhanced Scoring System
+    # Enhanced Scoring System, for all the live birds at once
     def pipe_score_check(self):
-        # This function can have improved time performance.
-        if self.pipe_list:
-            for bottom_pipe, top_pipe in zip(self.pipe_list[::2], self.pipe_list[1::2]):
-                for bird in self.bird_names:
-                    if 95 < bottom_pipe.centerx < 105:
-                        if self.cans_score[bird]:
-                            self.scores[bird] += 1
-                            self.fitnesses[bird] += 1000
-                            self.score_sound.play()
-                            self.cans_score[bird] = False
-                    if (abs(self.bird_hitboxes[bird].centery -
-                            (bottom_pipe.top + top_pipe.bottom)/2) < 150):
-                        self.fitnesses[bird] += 1
-                    else:
-                        self.fitnesses[bird] -= 1
+        for bottom_pipe, top_pipe in zip(self.pipe_list[::2], self.pipe_list[1::2]):
+            if 95 < bottom_pipe.centerx < 105:
+                passing = self.alive & self.cans_score
+                if passing.any():
+                    self.bird_scores[passing] += 1
+                    self.bird_fitnesses[passing] += 1000
+                    self.play_sound('score')
+                    self.cans_score[passing] = False
+
+            gap_distances = np.abs(self.bird_y - (bottom_pipe.top + top_pipe.bottom) / 2)
+            self.bird_fitnesses += np.where(gap_distances < 150, 1, -1) * self.alive
+
+            if bottom_pipe.centerx < 0:
+                self.cans_score[:] = True
+
+    def flap(self, bird_name):
+        self.bird_velocities[self.bird_slots[bird_name]] = FLAP_VELOCITY
+        self.play_sound('flap')
+
+    # Ai mechanism
+    def step_agents(self):
+        """
+        Let every live AI bird act on the current frame, the birds under the batched policy
+        with one `predict` call and the other agents with their own `predict`.
+        """
+
+        states = self.get_states()
+        flaps = np.zeros(len(self.bird_names), dtype=bool)
+
+        if self.policy is not None:
+            predict = getattr(self.policy, 'predict_batch', self.policy.predict)
+            actions = np.asarray(predict(states[self.policy_slots]))
+            flaps[self.policy_slots] = actions == 0
+
+        controlled = np.zeros(len(self.bird_names), dtype=bool)
+        controlled[self.policy_slots] = True
+        for i in np.flatnonzero(self.alive & ~controlled):
+            agent = self.ai_agents[self.bird_names[i]]
+            if agent:
+                flaps[i] = agent.predict(states[i].tolist()) == 0
+
+        flaps &= self.alive
+        if flaps.any():
+            self.bird_velocities[flaps] = FLAP_VELOCITY
+            self.play_sound('flap')
+
+    def step(self):
+        """
+        Advance the game by one frame.
+        """
+
+        self.frame += 1
+
+        # spawning obstacles
+        if self.frame % SPAWNPIPE_FRAMES == 0:
+            self.pipe_list.extend(self.create_pipe())
+
+        # bird flap animation
+        if self.frame % BIRD_FLAP_FRAMES == 0:
+            self.bird_indexes = (self.bird_indexes + 1) % len(BIRD_FRAME_FILES)
+
+        self.step_agents()
+
+        # implementing bird physics
+        alive = self.alive
+        self.bird_velocities[alive] += GRAVITY
+        self.bird_y[alive] = round_half_away(self.bird_y[alive] + self.bird_velocities[alive])
+        crashed = alive & self.check_collision()
+        if crashed.any():
+            self.play_sound('clash')
+            self.alive &= ~crashed
+            self.cans_score |= crashed
+
+        self.move_pipe()
+
+        # updating score
+        self.pipe_score_check()
+
+    def draw(self):
+        global DYNAMIC_FLOOR
+        self.win.blit(self.background_scene, (0, 0))
+
+        if self.alive.any():
+            for i in np.flatnonzero(self.alive):
+                bird_hitbox = pygame.Rect((0, 0), BIRD_SIZE)
+                bird_hitbox.center = (BIRD_X, self.bird_y[i])
+                self.win.blit(self.rotate_bird(i), bird_hitbox)
+
+            # rendering obstacles
+            self.draw_pipe()
+            self.score_display()
+
+        else:
+            # game over scene with scores
+            self.win.blit(self.gameover_scene, self.gameover_rect)
+            self.score_display()
 
-                if bottom_pipe.centerx < 0:
-                    self.cans_score = {bird_name: True for bird_name in self.bird_names}
+        # dynamic floor
+        DYNAMIC_FLOOR -= 1
+        self.draw_floor()
+        if DYNAMIC_FLOOR <= -500:
+            DYNAMIC_FLOOR = 0
+
+        pygame.display.update()
 
     def game_loop(self):
-        global DYNAMIC_FLOOR, FPS
         # Game loop
         while True:
             # setting up game events
-            for event in pygame.event.get():
+            for event in pygame.event.get() if self.render else ():
                 if event.type == pygame.QUIT:
-                    pygame.quit()
+                    self.kill()
                     return
 
-                if any(self.games_active.values()):
-                    for bird in self.bird_names:
-                        if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
+                    if self.alive.any():
+                        for bird in self.bird_names:
                             if self.games_active[bird] is True:
-                                self.bird_velocities[bird] = 0
-                                self.bird_velocities[bird] -= 6
-                                self.flap_sound.play()
-
-                        # Ai mechanism
-                        elif self.ai_agents[bird] and self.games_active[bird] is True:
-                            action = self.ai_agents[bird].predict(self.get_state(bird))
-                            if action == 0:
-                                self.bird_velocities[bird] = 0
-                                self.bird_velocities[bird] -= 6
-                                self.flap_sound.play()
-
-                        # bird flap event
-                        if event.type == self.BIRD_FLAP:
-                            if self.bird_indexes[bird] < 2:
-                                self.bird_indexes[bird] += 1
-                            else:
-                                self.bird_indexes[bird] = 0
-                                self.bird_animation(bird)
-
-                elif event.type == pygame.KEYDOWN and event.key == pygame.K_SPACE:
-                    for bird in self.bird_names:
-                        self.reset_game(bird, self.ai_agents[bird])
-                    self.pipe_list.clear()
-
-                # spawning obstacles
-                if event.type == self.SPAWNPIPE:
-                    self.pipe_list.extend(self.create_pipe())
-
-            self.win.blit(self.background_scene, (0, 0))
-
-            if any(self.games_active.values()):
-                for bird in self.bird_names:
-                    if self.games_active[bird]:
-                        # implementing bird physics
-                        self.bird_velocities[bird] += GRAVITY
-                        self.bird_hitboxes[bird].centery += self.bird_velocities[bird]
-                        self.rotate_bird(bird)
-                        self.win.blit(self.rotated_bird_sprites[bird], self.bird_hitboxes[bird])
-                        self.games_active[bird] = self.check_collision(bird)
-
-                # rendering obstacles
-                self.move_pipe()
-                self.draw_pipe()
-
-                # updating score
-                self.pipe_score_check()
-                self.score_display()
+                                self.flap(bird)
+                    else:
+                        for bird in self.bird_names:
+                            self.reset_game(bird, self.ai_agents[bird])
+                        self.pipe_list.clear()
+                        self.frame = 0
 
+            if self.alive.any():
+                self.step()
             else:
-                # game over scene with scores
-                self.win.blit(self.gameover_scene, self.gameover_rect)
                 self.update_score()
-                self.score_display()
                 if any(self.ai_agents.values()):
                     self.pipe_list.clear()
+                    self.frame = 0
                     return
 
-            # dynamic floor
-            DYNAMIC_FLOOR -= 1
-            self.draw_floor()
-            if DYNAMIC_FLOOR <= -500:
-                DYNAMIC_FLOOR = 0
-
-            pygame.display.update()
-            self.clock.tick(FPS)
+            if self.render:
+                self.draw()
+                self.clock.tick(FPS)
 
     @staticmethod
     def kill():
+        # Surfaces are converted for the display, they are loaded again for the next one.
+        _ASSETS.clear()
+        _SOUNDS.clear()
+        _ROTATED_BIRDS.clear()
         pygame.quit()
@@ -14,3 +14,22 @@ DYNAMIC_FLOOR = 0
 GRAVITY = 0.2
 
 PIPE_HEIGHT = [200, 400, 550]
+
+# Sprite geometry (sprites are scaled 2x)
+BIRD_SIZE = (68, 48)
+PIPE_SIZE = (104, 640)
+BIRD_X = 100
+
+# Bird and pipe dynamics
+FLAP_VELOCITY = -6
+PIPE_GAP = 250
+PIPE_SPEED = 5
+PIPE_START_X = 700
+CEILING = -150
+FLOOR_Y = 700
+
+# Timers (milliseconds), counted in frames of the fixed-step simulation
+SPAWNPIPE_MS = 1500
+BIRD_FLAP_MS = 200
+SPAWNPIPE_FRAMES = SPAWNPIPE_MS * FPS // 1000
+BIRD_FLAP_FRAMES = BIRD_FLAP_MS * FPS // 1000
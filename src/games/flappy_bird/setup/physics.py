@@ -0,0 +1,13 @@
+"""
+Physics helpers shared by `FlappyBird` and `VectorFlappyBird`.
+"""
+
+import numpy as np
+
+
+def round_half_away(x: np.ndarray):
+    """
+    Round like a float assignment to a ``pygame.Rect`` attribute does.
+    """
+
+    return np.copysign(np.floor(np.abs(x) + .5), x)
@@ -0,0 +1,143 @@
+"""
+Vectorized, display-free version of the flappy bird game.
+"""
+
+import numpy as np
+from games.vector_env import VectorEnv
+from games.flappy_bird.setup.constants import (
+    HEIGHT, GRAVITY, PIPE_HEIGHT, BIRD_SIZE, PIPE_SIZE, BIRD_X, FLAP_VELOCITY, PIPE_GAP,
+    PIPE_SPEED, PIPE_START_X, CEILING, FLOOR_Y, SPAWNPIPE_FRAMES)
+from games.flappy_bird.setup.physics import round_half_away
+
+PASS_REWARD = 1000
+
+
+class VectorFlappyBird(VectorEnv):
+    """
+    N independent flappy bird worlds (one bird and its own pipes each) advanced together.
+
+    Follows the `FlappyBird` frame logic with the timers counted in frames: a pipe pair spawns
+    every ``SPAWNPIPE_FRAMES`` frames, the bird falls with ``GRAVITY`` and collides with the
+    pipes, the ceiling and the floor. The reward of a frame is the `FlappyBird` fitness gained on
+    it: ``PASS_REWARD`` for passing a pipe, and +1 / -1 for every pipe the bird is close to / far
+    from the gap of.
+
+    Attributes:
+        STATE_FEATURES (int): Number of state features (same as `FlappyBird.get_state`).
+        NUM_ACTIONS (int): Number of possible actions (0 - flap, 1 - do nothing).
+
+    Args:
+        num_envs (int): Number of worlds to run side by side.
+        auto_reset (bool): Whether to reset crashed birds on `step`.
+        seed (int | None): Seed for the bird spawn heights and the pipe heights.
+    """
+    STATE_FEATURES = 3
+    NUM_ACTIONS = 2
+
+    def __init__(self, num_envs: int, auto_reset: bool = True, seed: int | None = None):
+        super().__init__(num_envs, auto_reset, seed)
+
+        # Hitbox geometry, all rects are positioned by their centers.
+        bird_width, self.bird_height = BIRD_SIZE
+        self.bird_left = BIRD_X - bird_width // 2
+        self.bird_right = self.bird_left + bird_width
+        self.pipe_width, self.pipe_height = PIPE_SIZE
+        self.pipe_heights_choices = np.array(PIPE_HEIGHT)
+
+        # A pipe lives until its right edge passes -50, which bounds the pipes alive at once.
+        first_right = PIPE_START_X - self.pipe_width // 2 + self.pipe_width
+        pipe_lifetime = -(-(first_right + 50) // PIPE_SPEED)
+        self.num_pipe_slots = pipe_lifetime // SPAWNPIPE_FRAMES + 1
+
+        self.bird_y = np.empty(num_envs, dtype=np.int64)
+        self.bird_velocities = np.empty(num_envs, dtype=np.float64)
+        self.alive = np.empty(num_envs, dtype=bool)
+        self.scores = np.empty(num_envs, dtype=np.int64)
+        self.frames = np.empty(num_envs, dtype=np.int64)
+
+        # Pipe pairs: center x and the top of the bottom pipe.
+        self.pipe_x = np.zeros((num_envs, self.num_pipe_slots), dtype=np.int64)
+        self.pipe_tops = np.zeros((num_envs, self.num_pipe_slots), dtype=np.int64)
+        self.pipe_active = np.zeros((num_envs, self.num_pipe_slots), dtype=bool)
+
+        self.reset()
+
+    def reset_envs(self, mask: np.ndarray):
+        self.bird_y[mask] = round_half_away(self.draw(np.flatnonzero(mask), 'normal', 400, 100))
+        self.bird_velocities[mask] = 0.
+        self.alive[mask] = True
+        self.scores[mask] = 0
+        self.frames[mask] = 0
+        self.pipe_active[mask] = False
+
+    def step_envs(self, actions: np.ndarray):
+        alive = self.alive.copy()
+
+        # Flap (the velocity is set, not added) and spawn pipes on the frames the timer fires.
+        self.bird_velocities[(actions == 0) & alive] = FLAP_VELOCITY
+        self.frames += alive
+        self._spawn_pipes(alive & (self.frames % SPAWNPIPE_FRAMES == 0))
+
+        # Bird physics and collision, against the pipes before they move this frame.
+        self.bird_velocities += GRAVITY * alive
+        self.bird_y = np.where(alive, round_half_away(self.bird_y + self.bird_velocities),
+                               self.bird_y).astype(np.int64)
+        self.alive &= ~self._check_collision()
+
+        # Move the pipes and drop the ones that left the screen.
+        self.pipe_x -= PIPE_SPEED * alive[:, None]
+        self.pipe_active &= self.pipe_x - self.pipe_width // 2 + self.pipe_width > -50
+
+        # Scoring, like `FlappyBird.pipe_score_check`.
+        passing = self.pipe_active & (np.abs(self.pipe_x - BIRD_X) < 5)
+        gap_distances = np.abs(self.bird_y[:, None] - (self.pipe_tops - PIPE_GAP / 2))
+        proximity = np.where(gap_distances < 150, 1, -1) * self.pipe_active
+        rewards = (PASS_REWARD * passing + proximity).sum(axis=1) * self.alive
+        self.scores += passing.sum(axis=1) * self.alive
+
+        return rewards, ~self.alive
+
+    def _spawn_pipes(self, mask: np.ndarray):
+        envs = np.flatnonzero(mask)
+        if envs.size == 0:
+            return
+
+        slots = (self.frames[envs] // SPAWNPIPE_FRAMES) % self.num_pipe_slots
+        self.pipe_x[envs, slots] = PIPE_START_X
+        self.pipe_tops[envs, slots] = self.draw(envs, 'choice', self.pipe_heights_choices)
+        self.pipe_active[envs, slots] = True
+
+    def _check_collision(self):
+        bird_tops = self.bird_y - self.bird_height // 2
+        bird_bottoms = bird_tops + self.bird_height
+        pipe_lefts = self.pipe_x - self.pipe_width // 2
+
+        # Rect overlap with the bottom pipe (top at pipe_tops) and the top pipe (bottom at
+        # pipe_tops - PIPE_GAP).
+        tops, bottoms = bird_tops[:, None], bird_bottoms[:, None]
+        horizontal = (pipe_lefts < self.bird_right) & \
+            (self.bird_left < pipe_lefts + self.pipe_width)
+        hits_bottom_pipe = (tops < self.pipe_tops + self.pipe_height) & (self.pipe_tops < bottoms)
+        hits_top_pipe = (tops < self.pipe_tops - PIPE_GAP) & \
+            (self.pipe_tops - PIPE_GAP - self.pipe_height < bottoms)
+        hits_pipe = (self.pipe_active & horizontal & (hits_bottom_pipe | hits_top_pipe)).any(axis=1)
+
+        return hits_pipe | (bird_tops <= CEILING) | (bird_bottoms >= FLOOR_Y)
+
+    def get_states(self):
+        """
+        :return: Array of shape (num_envs, STATE_FEATURES) with the bird height, the bird
+                velocity and the gap height of the oldest pipe (same as `FlappyBird.get_state`).
+        """
+
+        states = np.empty((self.num_envs, self.STATE_FEATURES), dtype=np.float32)
+        states[:, 0] = self.bird_y / HEIGHT
+        states[:, 1] = self.bird_velocities / -FLAP_VELOCITY
+
+        # Pipes move together, so the oldest active pipe is the leftmost one.
+        oldest = np.argmin(np.where(self.pipe_active, self.pipe_x, np.iinfo(np.int64).max), axis=1)
+        oldest_tops = self.pipe_tops[np.arange(self.num_envs), oldest]
+        states[:, 2] = np.where(self.pipe_active.any(axis=1),
+                                (oldest_tops - PIPE_GAP / 2) / HEIGHT, .5)
+
+        return states
@@ -1,18 +1,21 @@
 import pygame
 import random
+from bisect import bisect_left, bisect_right
 
 SCREEN_SIZE = (800, 600)
 PLAYER_SIZE = (50, 50)
+PLATFORM_HEIGHT = 20
 PLATFORM_COLOR = (255, 0, 0)
 POINTS_PER_PLATFORM = 10
 STARTING_PLATFORMS = 20
 
 
 class Player():
-    def __init__(self):
+    def __init__(self, keyboard=True):
         self.rect = pygame.Rect(SCREEN_SIZE[0] // 2, SCREEN_SIZE[1] // 2, *PLAYER_SIZE)
         self.y_velocity = 0
         self.on_ground = False
+        self.keyboard = keyboard  # Whether the arrow keys move the player.
 
     def jump(self):
         if self.on_ground:
@@ -20,11 +23,12 @@ class Player():
             self.on_ground = False
 
     def update(self, platforms):
-        keys = pygame.key.get_pressed()
-        if keys[pygame.K_LEFT]:
-            self.rect.move_ip(-5, 0)
-        if keys[pygame.K_RIGHT]:
-            self.rect.move_ip(5, 0)
+        if self.keyboard:
+            keys = pygame.key.get_pressed()
+            if keys[pygame.K_LEFT]:
+                self.rect.move_ip(-5, 0)
+            if keys[pygame.K_RIGHT]:
+                self.rect.move_ip(5, 0)
 
         if self.rect.left < 0: self.rect.left = 0
         if self.rect.right > SCREEN_SIZE[0]: self.rect.right = SCREEN_SIZE[0]
@@ -32,9 +36,9 @@ class Player():
         self.y_velocity += 0.5
         self.rect.move_ip(0, self.y_velocity)
 
-        for plat in [p for p in platforms if p.rect.colliderect(self.rect)]:
-            if self.rect.bottom < plat.rect.bottom:
-                self.rect.bottom = plat.rect.top
+        for plat_top in platforms.colliding_tops(self.rect):
+            if self.rect.bottom < plat_top + PLATFORM_HEIGHT:
+                self.rect.bottom = plat_top
                 self.y_velocity = 0
                 self.on_ground = True
                 return True
@@ -46,14 +50,85 @@ class Platform():
         self.rect = pygame.Rect(x, y, w, h)
 
 
-class Platformer():
+class PlatformStack():
+    """
+    The platforms in a list sorted from the top of the screen down. Platforms keep fixed world
+    coordinates and the stack keeps a scroll offset (a platform is on the screen at its y plus
+    the offset), so scrolling moves no platform. Collision queries bisect the list for the
+    platforms in the vertical band of the queried rect, in O(log n). Platforms leave at the
+    bottom in O(1), and adding one shifts the platforms below it (O(n), over the few platforms
+    of a screen). All platforms are PLATFORM_HEIGHT high.
+    """
+
     def __init__(self):
-        pygame.init()
-        self.screen = pygame.display.set_mode(SCREEN_SIZE)
-        self.clock = pygame.time.Clock()
-        self.font = pygame.font.Font(None, 36)
-        self.player = Player()
         self.platforms = []
+        self.scroll = 0
+
+    def __len__(self):
+        return len(self.platforms)
+
+    def clear(self):
+        self.platforms.clear()
+        self.scroll = 0
+
+    def add(self, x, y, w):
+        """
+        Add a platform at screen position (x, y).
+        """
+
+        platform = Platform(x, y - self.scroll, w, PLATFORM_HEIGHT)
+        self.platforms.insert(bisect_left(self.platforms, platform.rect.y, key=_platform_y),
+                              platform)
+
+    def scroll_down(self, pixels=1):
+        self.scroll += pixels
+
+    def drop_below(self, screen_bottom):
+        while self.platforms and self.platforms[-1].rect.top + self.scroll > screen_bottom:
+            self.platforms.pop()
+
+    def colliding_tops(self, rect):
+        """
+        Screen y of the top of every platform overlapping the rect (in screen coordinates).
+        """
+
+        top = rect.top - self.scroll
+        bottom = rect.bottom - self.scroll
+        start = bisect_right(self.platforms, top - PLATFORM_HEIGHT, key=_platform_y)
+        end = bisect_left(self.platforms, bottom, key=_platform_y)
+        for i in range(start, end):
+            plat_rect = self.platforms[i].rect
+            if plat_rect.left < rect.right and rect.left < plat_rect.right:
+                yield plat_rect.top + self.scroll
+
+    def screen_rects(self):
+        for platform in self.platforms:
+            yield platform.rect.move(0, self.scroll)
+
+
+def _platform_y(platform):
+    return platform.rect.y
+
+
+class Platformer():
+    """
+    The platformer game.
+
+    Args:
+        headless (bool): Only simulate the game, which can then not be drawn. A headless game
+                does not initialize pygame nor touch the display or the keyboard state.
+    """
+
+    def __init__(self, headless=False):
+        self.headless = headless
+        self.screen = self.clock = self.font = None
+        if not headless:
+            pygame.init()
+            self.screen = pygame.display.set_mode(SCREEN_SIZE)
+            self.clock = pygame.time.Clock()
+            self.font = pygame.font.Font(None, 36)
+        self.player = Player(keyboard=not headless)
+        self.platforms = PlatformStack()
         self.score = 0
         self.platform_width = 100
         self.platform_spacing = 150
@@ -61,17 +136,47 @@ class Platformer():
 
     def generate_platforms(self, num_platforms):
         for i in range(num_platforms):
-            self.platforms.append(Platform(random.randint(0, SCREEN_SIZE[0] - self.platform_width),
-                                           i * self.platform_spacing, self.platform_width, 20))
+            self.platforms.add(random.randint(0, SCREEN_SIZE[0] - self.platform_width),
+                               i * self.platform_spacing, self.platform_width)
 
     def reset_game(self):
-        self.player = Player()
+        self.player = Player(keyboard=not self.headless)
         self.score = 0
         self.platforms.clear()
         self.platform_width = 100
         self.platform_spacing = 150
         self.generate_platforms(STARTING_PLATFORMS)
 
+    def step(self):
+        """
+        Advance the game by one frame.
+        """
+
+        on_platform = self.player.update(self.platforms)
+        self.platforms.drop_below(SCREEN_SIZE[1])
+        if self.player.rect.top < 200 and len(self.platforms) * self.platform_spacing < \
+                SCREEN_SIZE[1]:
+            self.generate_platforms(1)
+
+        if on_platform and self.score % (POINTS_PER_PLATFORM * 20) == 0 and self.score != 0:
+            self.platform_width = max(20, self.platform_width - 10)
+            self.platform_spacing += 50
+
+        self.platforms.scroll_down(1)
+        for plat_top in self.platforms.colliding_tops(self.player.rect):
+            self.score += POINTS_PER_PLATFORM
+
+    def draw(self):
+        self.screen.fill((255, 255, 255))
+        for platform_rect in self.platforms.screen_rects():
+            pygame.draw.rect(self.screen, PLATFORM_COLOR, platform_rect)
+        pygame.draw.rect(self.screen, (0, 0, 255), self.player.rect)
+
+        self.screen.blit(self.font.render("Score: " + str(self.score), True, (0, 0, 0)),
+                         (10, 10))
+
+        pygame.display.flip()
+
     def game_loop(self):
         while True:
             for event in pygame.event.get():
@@ -80,31 +185,9 @@ class Platformer():
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_SPACE:
                         self.player.jump()
-            self.screen.fill((255, 255, 255))
-
-            on_platform = self.player.update(self.platforms)
-            while self.platforms and self.platforms[0].rect.top > SCREEN_SIZE[1]:
-                self.platforms.pop(0)
-            if self.player.rect.top < 200 and len(self.platforms) * self.platform_spacing < \
-                    SCREEN_SIZE[1]:
-                self.generate_platforms(1)
-
-            if on_platform and self.score % (POINTS_PER_PLATFORM * 20) == 0 and self.score != 0:
-                self.platform_width = max(20, self.platform_width - 10)
-                self.platform_spacing += 50
-
-            for platform in self.platforms:
-                pygame.draw.rect(self.screen, PLATFORM_COLOR, platform.rect)
-                platform.rect.move_ip(0, 1)
-                if platform.rect.colliderect(self.player.rect):
-                    self.score += POINTS_PER_PLATFORM
-
-            pygame.draw.rect(self.screen, (0, 0, 255), self.player.rect)
-
-            self.screen.blit(self.font.render("Score: " + str(self.score), True, (0, 0, 0)),
-                             (10, 10))
 
-            pygame.display.flip()
+            self.step()
+            self.draw()
             self.clock.tick(60)
 
     @staticmethod
@@ -0,0 +1,167 @@
+"""
+Vectorized, display-free version of the platformer game.
+"""
+
+import numpy as np
+from games.vector_env import VectorEnv
+from games.platformer_game.platformer_game import (
+    SCREEN_SIZE, PLAYER_SIZE, PLATFORM_HEIGHT, POINTS_PER_PLATFORM, STARTING_PLATFORMS)
+_NOTHING, _LEFT, _RIGHT, _JUMP = range(4)
+
+
+class VectorPlatformer(VectorEnv):
+    """
+    N independent platformer games advanced together.
+
+    Follows the `Platformer` frame logic: the player moves 5 pixels sideways, jumps from the
+    ground, falls with a 0.5 gravity and lands on platforms, while the platforms scroll down a
+    pixel per frame and get narrower and sparser as the score grows. Platforms that scroll past
+    the bottom edge are dropped, and a game is over once the player falls off the screen. The
+    reward of a frame is the score gained on it.
+
+    Attributes:
+        STATE_FEATURES (int): Number of state features: player x, y and velocity, whether the
+                player is on the ground, and the offset of the nearest platform below it.
+        NUM_ACTIONS (int): Number of possible actions (0 - nothing, 1 - left, 2 - right, 3 - jump).
+
+    Args:
+        num_envs (int): Number of games to run side by side.
+        auto_reset (bool): Whether to reset finished games on `step`.
+        seed (int | None): Seed for the platforms placement.
+    """
+    STATE_FEATURES = 6
+    NUM_ACTIONS = 4
+
+    def __init__(self, num_envs: int, auto_reset: bool = True, seed: int | None = None):
+        super().__init__(num_envs, auto_reset, seed)
+        self.s_width, self.s_height = SCREEN_SIZE
+        self.player_width, self.player_height = PLAYER_SIZE
+
+        self.player_x = np.empty(num_envs, dtype=np.int64)
+        self.player_y = np.empty(num_envs, dtype=np.int64)
+        self.y_velocities = np.empty(num_envs, dtype=np.float64)
+        self.on_ground = np.empty(num_envs, dtype=bool)
+        self.scores = np.empty(num_envs, dtype=np.int64)
+        self.done = np.empty(num_envs, dtype=bool)
+        self.platform_widths = np.empty(num_envs, dtype=np.int64)
+        self.platform_spacings = np.empty(num_envs, dtype=np.int64)
+
+        # Platform slots, their widths are kept per platform since difficulty changes them.
+        self.platform_x = np.zeros((num_envs, STARTING_PLATFORMS), dtype=np.int64)
+        self.platform_y = np.zeros((num_envs, STARTING_PLATFORMS), dtype=np.int64)
+        self.platform_w = np.zeros((num_envs, STARTING_PLATFORMS), dtype=np.int64)
+        self.platform_active = np.zeros((num_envs, STARTING_PLATFORMS), dtype=bool)
+
+        self.reset()
+
+    def reset_envs(self, mask: np.ndarray):
+        envs = np.flatnonzero(mask)
+        self.player_x[envs] = self.s_width // 2
+        self.player_y[envs] = self.s_height // 2
+        self.y_velocities[envs] = 0.
+        self.on_ground[envs] = False
+        self.scores[envs] = 0
+        self.done[envs] = False
+        self.platform_widths[envs] = 100
+        self.platform_spacings[envs] = 150
+
+        # `Platformer.generate_platforms(STARTING_PLATFORMS)`.
+        slots = np.arange(STARTING_PLATFORMS)
+        self.platform_x[envs] = self.draw(envs, 'integers', 0, self.s_width - 100 + 1,
+                                          shape=(STARTING_PLATFORMS,))
+        self.platform_y[envs] = slots * self.platform_spacings[envs, None]
+        self.platform_w[envs] = 100
+        self.platform_active[envs] = True
+
+    def step_envs(self, actions: np.ndarray):
+        active = ~self.done
+        scores = self.scores.copy()
+
+        # Jump from the ground, then move sideways inside the screen.
+        jump = (actions == _JUMP) & self.on_ground & active
+        self.y_velocities[jump] = -10.
+        self.on_ground &= ~jump
+        moves = np.where(actions == _LEFT, -5, np.where(actions == _RIGHT, 5, 0)) * active
+        self.player_x = np.clip(self.player_x + moves, 0, self.s_width - self.player_width)
+
+        # Gravity (``Rect.move_ip`` truncates the velocity) and landing on a platform.
+        self.y_velocities += .5 * active
+        self.player_y += self.y_velocities.astype(np.int64) * active
+        landing = self._colliding() & \
+            (self.player_y[:, None] + self.player_height < self.platform_y + PLATFORM_HEIGHT)
+        on_platform = landing.any(axis=1) & active
+        landing_slots = np.argmax(landing, axis=1)[on_platform]
+        self.player_y[on_platform] = self.platform_y[on_platform, landing_slots] - \
+            self.player_height
+        self.y_velocities[on_platform] = 0.
+        self.on_ground |= on_platform
+
+        # Drop platforms below the screen, and add one on top when the player climbs high.
+        self.platform_active &= ~(active[:, None] & (self.platform_y > self.s_height))
+        self._add_platforms(active & (self.player_y < 200) &
+                            (self.platform_active.sum(axis=1) * self.platform_spacings <
+                             self.s_height))
+
+        # Difficulty scaling.
+        harder = on_platform & (self.scores % (POINTS_PER_PLATFORM * 20) == 0) & \
+            (self.scores != 0)
+        self.platform_widths[harder] = np.maximum(20, self.platform_widths[harder] - 10)
+        self.platform_spacings[harder] += 50
+
+        # Scroll the platforms down and score every platform touching the player.
+        self.platform_y += active[:, None]
+        self.scores += self._colliding().sum(axis=1) * POINTS_PER_PLATFORM * active
+        self.done |= self.player_y > self.s_height
+
+        return self.scores - scores, self.done.copy()
+
+    def _colliding(self):
+        """
+        :return: Boolean array of shape (num_envs, STARTING_PLATFORMS), which platforms overlap
+                the player rect.
+        """
+
+        player_x, player_y = self.player_x[:, None], self.player_y[:, None]
+        return self.platform_active & \
+            (self.platform_x < player_x + self.player_width) & \
+            (player_x < self.platform_x + self.platform_w) & \
+            (self.platform_y < player_y + self.player_height) & \
+            (player_y < self.platform_y + PLATFORM_HEIGHT)
+
+    def _add_platforms(self, mask: np.ndarray):
+        envs = np.flatnonzero(mask & ~self.platform_active.all(axis=1))
+        if envs.size == 0:
+            return
+
+        slots = np.argmin(self.platform_active[envs], axis=1)
+        widths = self.platform_widths[envs]
+        self.platform_x[envs, slots] = (self.draw(envs, 'random') *
+                                        (self.s_width - widths + 1)).astype(np.int64)
+        self.platform_y[envs, slots] = 0
+        self.platform_w[envs, slots] = widths
+        self.platform_active[envs, slots] = True
+
+    def get_states(self):
+        """
+        :return: Array of shape (num_envs, STATE_FEATURES).
+        """
+
+        states = np.empty((self.num_envs, self.STATE_FEATURES), dtype=np.float32)
+        states[:, 0] = self.player_x / self.s_width
+        states[:, 1] = self.player_y / self.s_height
+        states[:, 2] = self.y_velocities / 10
+        states[:, 3] = self.on_ground
+
+        # Nearest platform whose top is at or below the player's feet.
+        player_bottoms = self.player_y + self.player_height
+        below = self.platform_active & (self.platform_y >= player_bottoms[:, None])
+        nearest = np.argmin(np.where(below, self.platform_y, np.iinfo(np.int64).max), axis=1)
+        rows = np.arange(self.num_envs)
+        has_below = below.any(axis=1)
+        platform_centers = self.platform_x[rows, nearest] + self.platform_w[rows, nearest] / 2
+        states[:, 4] = np.where(has_below, (platform_centers - self.player_x -
+                                            self.player_width / 2) / self.s_width, 0.)
+        states[:, 5] = np.where(has_below, (self.platform_y[rows, nearest] - player_bottoms) /
+                                self.s_height, 1.)
+
+        return states
@@ -0,0 +1,111 @@
+"""
+Common batched environment interface for the games.
+"""
+
+import abc
+import numpy as np
+
+
+class VectorEnv(abc.ABC):
+    """
+    N independent copies of a game advanced together with ``reset()`` / ``step(actions)``.
+
+    Observations are contiguous float32 arrays of shape (num_envs, STATE_FEATURES), rewards are
+    float32 arrays and dones are boolean masks, both of shape (num_envs,). With `auto_reset`, a
+    sub-environment that finished on a step is reset right away, so the observation returned for
+    it is the first observation of its next episode. Without it, a finished sub-environment is
+    frozen (zero rewards, still done) until `reset` is called.
+
+    The sub-environments share a random generator, so the game of one depends on when the
+    others draw. `reset` can give each its own generator instead (see `draw`), making its game
+    independent of the other sub-environments and of its row.
+
+    Subclasses implement `reset_envs`, `step_envs` and `get_states`.
+
+    Attributes:
+        STATE_FEATURES (int): Number of observation features.
+        NUM_ACTIONS (int): Number of possible actions.
+
+    Args:
+        num_envs (int): Number of sub-environments.
+        auto_reset (bool): Whether to reset finished sub-environments on `step`.
+        seed (int | None): Seed of the environments random generator.
+    """
+    STATE_FEATURES = 0
+    NUM_ACTIONS = 0
+
+    def __init__(self, num_envs: int, auto_reset: bool = True, seed: int | None = None):
+        self.num_envs = num_envs
+        self.auto_reset = auto_reset
+        self.rng = np.random.default_rng(seed)
+        self.env_rngs = None
+
+    def reset(self, seed: int | None = None, env_seeds=None):
+        """
+        Reset every sub-environment.
+
+        :param seed: Reseed the environments random generator if given.
+        :param env_seeds: Seeds of a random generator per sub-environment, shape (num_envs,),
+                used instead of the shared one from now on if given.
+        :return: The observations, float32 array of shape (num_envs, STATE_FEATURES).
+        """
+
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+        if env_seeds is not None:
+            self.env_rngs = [np.random.default_rng(env_seed) for env_seed in env_seeds]
+        self.reset_envs(np.ones(self.num_envs, dtype=bool))
+
+        return self.get_states()
+
+    def step(self, actions: np.ndarray):
+        """
+        Advance every sub-environment by a single frame.
+
+        :param actions: Integer array of shape (num_envs,).
+        :return: The observations (num_envs, STATE_FEATURES), the rewards (num_envs,) and the
+                done mask (num_envs,).
+        """
+
+        rewards, dones = self.step_envs(np.asarray(actions))
+        if self.auto_reset and dones.any():
+            self.reset_envs(dones)
+
+        return self.get_states(), rewards.astype(np.float32, copy=False), dones
+
+    def draw(self, envs: np.ndarray, method: str, *args, shape: tuple = ()):
+        """
+        Draw random values for some sub-environments with a `numpy.random.Generator` method.
+
+        :param envs: Indices of the sub-environments.
+        :param method: The generator method, e.g. 'integers'.
+        :param args: The method arguments, but the size.
+        :param shape: Shape of the values of a sub-environment.
+        :return: Array of shape (len(envs), *shape), drawn at once from the shared generator or
+                row by row from the generators of the sub-environments.
+        """
+
+        if self.env_rngs is None:
+            return getattr(self.rng, method)(*args, size=(len(envs), *shape))
+        return np.array([getattr(self.env_rngs[env], method)(*args, size=shape or None)
+                         for env in envs])
+
+    @abc.abstractmethod
+    def reset_envs(self, mask: np.ndarray):
+        """
+        Reset the sub-environments selected by a boolean mask of shape (num_envs,).
+        """
+
+    @abc.abstractmethod
+    def step_envs(self, actions: np.ndarray):
+        """
+        Advance every sub-environment that is not done by a single frame.
+
+        :return: The rewards and the done mask, both of shape (num_envs,).
+        """
+
+    @abc.abstractmethod
+    def get_states(self):
+        """
+        :return: A new float32 array of shape (num_envs, STATE_FEATURES).
+        """
@@ -0,0 +1,248 @@
+"""
+Per-phase timers and counters for the hot paths of the games and the training loops.
+
+The training loops time their phases under shared names, so a run tells whether it is bound
+by the simulation, the action selection or the learner:
+
+    env.events, env.step, env.render     - the game (event handling, logic, drawing)
+    policy.act                           - action selection
+    replay.append, replay.sample,
+    replay.update_priorities             - the replay buffer
+    data.load                            - building supervised mini-batches
+    learner.forward, learner.backward,
+    learner.target_update                - the gradient updates
+    neat.create_nets, neat.play          - NEAT generations
+
+Phases may nest (`neat.play` contains the `env.*` and `policy.act` phases of its frames).
+
+Profiling is off by default, then `timer` returns a shared no-op context manager and `count`
+returns at once, so the instrumented code pays a function call per phase. Once enabled, every
+phase keeps a histogram of its durations, in power-of-two microsecond buckets, which `flush`
+hands to the sinks and resets:
+
+    import instrumentation
+    instrumentation.enable(instrumentation.JsonlSink('profile.jsonl'))
+    train_qnet(...)  # A record per episode.
+    print(instrumentation.format_record(instrumentation.PROFILER.last_record))
+"""
+
+import json
+import time
+import contextlib
+from functools import wraps
+
+_NULL_TIMER = contextlib.nullcontext()
+
+
+class PhaseHistogram:
+    """
+    Durations of a phase. Bucket ``i`` counts the durations of ``[2^(i-1), 2^i)`` microseconds
+    (bucket 0 the ones under a microsecond).
+    """
+
+    __slots__ = ('count', 'total', 'min', 'max', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.
+        self.min = float('inf')
+        self.max = 0.
+        self.buckets = {}
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.total += seconds
+        if seconds < self.min:
+            self.min = seconds
+        if seconds > self.max:
+            self.max = seconds
+        bucket = int(seconds * 1e6).bit_length()
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def to_dict(self):
+        # Buckets are keyed by their upper bound, in microseconds.
+        return {'count': self.count, 'total_s': self.total, 'mean_s': self.total / self.count,
+                'min_s': self.min, 'max_s': self.max,
+                'buckets_us': {str(1 << bucket): self.buckets[bucket]
+                               for bucket in sorted(self.buckets)}}
+
+
+class _Timer:
+    __slots__ = ('profiler', 'name', 'start')
+
+    def __init__(self, profiler, name: str):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.profiler.record(self.name, time.perf_counter() - self.start)
+
+
+class Profiler:
+    """
+    Collects phase histograms and counters, and passes them to its sinks on `flush`.
+
+    Args:
+        enabled (bool): Whether to collect anything.
+        sinks (list | None): Callables receiving the flushed records (dicts), e.g. a
+                `JsonlSink`.
+    """
+
+    def __init__(self, enabled: bool = False, sinks: list | None = None):
+        self.enabled = enabled
+        self.sinks = list(sinks or [])
+        self.phases = {}
+        self.counters = {}
+        self.last_record = None
+        self.start = time.perf_counter()
+
+    def timer(self, name: str):
+        """
+        :return: A context manager timing its block as the phase `name`.
+        """
+
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name)
+
+    def timed(self, name: str):
+        """
+        Decorator timing every call of the function as the phase `name`.
+        """
+
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with _Timer(self, name):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def timed_iter(self, name: str, iterable):
+        """
+        :return: The iterable, with the production of every item timed as the phase `name`.
+        """
+
+        if not self.enabled:
+            return iterable
+        return self._timed_iter(name, iterable)
+
+    def _timed_iter(self, name: str, iterable):
+        iterator = iter(iterable)
+        while True:
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+            self.record(name, time.perf_counter() - start)
+            yield item
+
+    def record(self, name: str, seconds: float):
+        if not self.enabled:
+            return
+        histogram = self.phases.get(name)
+        if histogram is None:
+            histogram = self.phases[name] = PhaseHistogram()
+        histogram.add(seconds)
+
+    def count(self, name: str, n: int = 1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def flush(self, **fields):
+        """
+        Pass a record of everything collected since the last flush to the sinks, then reset.
+
+        :param fields: Extra fields of the record, e.g. the episode or the generation.
+        :return: The record, or None when profiling is off or nothing was collected.
+        """
+
+        if not self.enabled or not (self.phases or self.counters):
+            return None
+
+        now = time.perf_counter()
+        record = dict(fields)
+        record['wall_s'] = now - self.start
+        record['phases'] = {name: histogram.to_dict() for name, histogram in self.phases.items()}
+        record['counters'] = dict(self.counters)
+        self.phases, self.counters, self.start = {}, {}, now
+
+        self.last_record = record
+        for sink in self.sinks:
+            sink(record)
+
+        return record
+
+    def reset(self):
+        self.phases, self.counters, self.start = {}, {}, time.perf_counter()
+
+
+class JsonlSink:
+    """
+    Appends every record as a line of JSON to a file.
+
+    Args:
+        path (str): The file to append to.
+    """
+
+    def __init__(self, path: str):
+        self.file = open(path, 'a')
+
+    def __call__(self, record: dict):
+        self.file.write(json.dumps(record) + '\n')
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+def format_record(record: dict):
+    """
+    :return: A table of the phases of a record, by total time, with their share of the wall
+            time (nested phases are counted in their parents too).
+    """
+
+    lines = [f"{'phase':<28}{'count':>10}{'total s':>10}{'mean us':>10}{'wall %':>8}"]
+    phases = sorted(record['phases'].items(), key=lambda item: -item[1]['total_s'])
+    for name, phase in phases:
+        lines.append(f"{name:<28}{phase['count']:>10}{phase['total_s']:>10.3f}"
+                     f"{phase['mean_s'] * 1e6:>10.1f}"
+                     f"{100 * phase['total_s'] / record['wall_s']:>8.1f}")
+    for name, value in record['counters'].items():
+        lines.append(f"{name:<28}{value:>10}")
+
+    return '\n'.join(lines)
+
+
+# The profiler of the instrumented code.
+PROFILER = Profiler()
+timer = PROFILER.timer
+timed = PROFILER.timed
+timed_iter = PROFILER.timed_iter
+count = PROFILER.count
+flush = PROFILER.flush
+
+
+def enable(*sinks):
+    """
+    Start profiling into `PROFILER`, flushing to the given sinks.
+    """
+
+    PROFILER.sinks.extend(sinks)
+    PROFILER.reset()
+    PROFILER.enabled = True
+
+
+def disable():
+    PROFILER.enabled = False
+    PROFILER.sinks.clear()
+    PROFILER.reset()
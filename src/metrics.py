@@ -0,0 +1,179 @@
+"""
+Training progress logged record by record while a run goes, and plotted offline.
+
+A metrics log is a JSON-lines file, a record per episode / epoch / generation:
+
+    {"step": 12, "time": 1700000000.0, "average_points": 3.2, "average_points_rolling": 2.9}
+
+The chosen values are logged with their rolling mean over the last records, kept
+incrementally, so the log can be followed on a headless host (``tail -f``) without plotting
+anything. The file is appended to, a resumed run continues it and its rolling means start from
+the logged records.
+Plot a log with ``python game_learn.py plot <log>``.
+"""
+
+import os
+import json
+import time
+from collections import deque
+
+ROLLING_SUFFIX = '_rolling'
+
+
+class RollingMean:
+    """
+    Mean of the last `window` values, updated in constant time per value.
+
+    Args:
+        window (int): Number of values averaged.
+    """
+
+    def __init__(self, window: int):
+        self.values = deque(maxlen=window)
+        self.total = 0.
+
+    def add(self, value: float):
+        if len(self.values) == self.values.maxlen:
+            self.total -= self.values[0]
+        self.values.append(value)
+        self.total += value
+
+        return self.mean
+
+    @property
+    def mean(self):
+        return self.total / len(self.values) if self.values else float('nan')
+
+
+class MetricsLog:
+    """
+    Appends records of training values to a metrics log, with the rolling means of some of
+    them. Records are flushed as they are logged.
+
+    Args:
+        path (str): The log file, appended to.
+        rolling (tuple[str, ...]): Names of the values logged with their rolling mean.
+        window (int): Number of records of the rolling means.
+    """
+
+    def __init__(self, path: str, rolling: tuple[str, ...] = (), window: int = 5):
+        self.path = path
+        self.rolling = {name: RollingMean(window) for name in rolling}
+
+        # Resume the rolling means of an existing log.
+        if os.path.exists(path):
+            for record in read_metrics(path)[-window:]:
+                self._add_values(record)
+        self.file = open(path, 'a')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def log(self, step: int, **values: float):
+        """
+        Append a record.
+
+        :param step: The episode / epoch / generation of the values.
+        :param values: The values, by name.
+        :return: The record, with the rolling means.
+        """
+
+        record = {'step': step, 'time': time.time(), **values}
+        record.update({name + ROLLING_SUFFIX: mean
+                       for name, mean in self._add_values(values).items()})
+        self.file.write(json.dumps(record) + '\n')
+        self.file.flush()
+
+        return record
+
+    def _add_values(self, values: dict):
+        return {name: rolling.add(values[name])
+                for name, rolling in self.rolling.items() if name in values}
+
+    def close(self):
+        self.file.close()
+
+
+def read_metrics(path: str):
+    """
+    :param path: A metrics log.
+    :return: Its records in step order, the last one of every step when a resumed run logged
+            a step again. A line cut by an interrupted write is ignored.
+    """
+
+    records = {}
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            records[record['step']] = record
+
+    return [records[step] for step in sorted(records)]
+
+
+def plot_curve(values: list[float], title: str, xlabel: str, ylabel: str, steps=None,
+               rolling_window: int = 5, output: str | None = None):
+    """
+    Plot values with their rolling mean.
+
+    :param steps: The x of the values, their indices by default.
+    :param output: Save the figure to this image file instead of showing it (no display is
+            needed then).
+    """
+
+    import matplotlib
+    if output:
+        matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    rolling = RollingMean(rolling_window)
+    rolling_means = [rolling.add(value) for value in values]
+    steps = range(len(values)) if steps is None else steps
+
+    plt.figure(figsize=(8, 5), facecolor='white')
+
+    plt.plot(steps, values, linewidth=1, color='cyan')
+    plt.plot(steps, rolling_means, linewidth=2, color='magenta')
+
+    text_color = 'black'
+
+    ax = plt.gca()
+    ax.set_facecolor('black')
+    plt.grid()
+    plt.title(title, color=text_color, fontsize=30)
+    plt.xlabel(xlabel, color=text_color, fontsize=20)
+    plt.ylabel(ylabel, color=text_color, fontsize=20)
+    ax.tick_params(axis='x', colors=text_color)
+    ax.tick_params(axis='y', colors=text_color)
+    if output:
+        plt.savefig(output, bbox_inches='tight')
+        plt.close()
+    else:
+        plt.show()
+
+
+def plot_metrics(path: str, name: str | None = None, rolling_window: int = 5,
+                 output: str | None = None):
+    """
+    Plot a value of a metrics log.
+
+    :param name: The value to plot, the first one of the log by default.
+    :param output: Save the figure to this image file instead of showing it.
+    """
+
+    records = read_metrics(path)
+    if not records:
+        raise ValueError(f"Metrics log {path} is empty.")
+    if name is None:
+        name = next(key for key in records[0]
+                    if key not in ('step', 'time') and not key.endswith(ROLLING_SUFFIX))
+
+    records = [record for record in records if name in record]
+    plot_curve([record[name] for record in records], name.replace('_', ' ').title(), 'Step',
+               name.replace('_', ' ').title(), steps=[record['step'] for record in records],
+               rolling_window=rolling_window, output=output)
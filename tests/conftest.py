@@ -0,0 +1,32 @@
+"""
+The code is run from the src directory, with imports relative to it (and to the flappy bird
+directory, for its constants).
+"""
+
+import os
+import sys
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+FLAPPY_BIRD_DIR = os.path.join(SRC_DIR, 'games', 'flappy_bird')
+
+for path in (SRC_DIR, FLAPPY_BIRD_DIR):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+
+def write_neat_config(config_name: str, directory, pop_size: int):
+    """
+    :return: The path of a copy of the NEAT configuration ``src/AI_Types/<config_name>`` with
+            another population size, written in `directory`.
+    """
+    with open(os.path.join(SRC_DIR, 'AI_Types', config_name)) as f:
+        lines = [f'pop_size = {pop_size}' if line.startswith('pop_size') else line.rstrip('\n')
+                 for line in f]
+    config_path = directory / config_name
+    config_path.write_text('\n'.join(lines))
+
+    return str(config_path)
@@ -0,0 +1,108 @@
+import sys
+import json
+import pickle
+import subprocess
+import numpy as np
+import pytest
+import torch
+from conftest import SRC_DIR
+from AI_Types.replay_buffer import SharedReplayBuffer
+from AI_Types.AI_DQL_actor_learner import SharedWeights
+
+SEGMENT_CAPACITY = 16
+MARGIN = 4
+
+
+@pytest.fixture
+def mem_buff():
+    mem_buff = SharedReplayBuffer(2 * SEGMENT_CAPACITY, 1, num_segments=2, margin=MARGIN,
+                                  device=torch.device('cpu'), seed=0)
+    yield mem_buff
+    mem_buff.close()
+
+
+def extend(mem_buff: SharedReplayBuffer, segment: int, rewards: np.ndarray):
+    num_transitions = len(rewards)
+    mem_buff.extend(np.zeros((num_transitions, 1)), np.zeros(num_transitions, dtype=np.int64),
+                    rewards, np.zeros((num_transitions, 1)), np.zeros(num_transitions),
+                    segment=segment)
+
+
+def test_sample_skips_the_margin_ahead_of_the_writers(mem_buff):
+    rng = np.random.default_rng(0)
+    written = 0
+    for _ in range(40):
+        segment = int(rng.integers(2))
+        batch_size = int(rng.integers(1, MARGIN + 1))
+        extend(mem_buff, segment, np.arange(written, written + batch_size, dtype=np.float32))
+        written += batch_size
+
+        sample = mem_buff.sample(512)
+        segments, slots = np.divmod(sample.indices, SEGMENT_CAPACITY)
+        positions, sizes = mem_buff.counters[segments].T
+        wrapped = sizes == SEGMENT_CAPACITY
+        # Slots of a wrapped segment are never in [pos, pos + margin), of others below the size.
+        assert np.all(np.where(wrapped, (slots - positions) % SEGMENT_CAPACITY >= MARGIN,
+                               slots < sizes))
+        np.testing.assert_array_equal(sample.rewards.numpy(), mem_buff.rewards[sample.indices])
+
+    # Both segments wrapped around.
+    assert np.all(mem_buff.counters[:, 1] == SEGMENT_CAPACITY)
+
+
+def test_extend_rejects_batches_larger_than_the_margin(mem_buff):
+    with pytest.raises(ValueError):
+        extend(mem_buff, 0, np.zeros(MARGIN + 1, dtype=np.float32))
+    assert len(mem_buff) == 0
+
+
+def test_unpickled_buffer_shares_the_memory(mem_buff):
+    attached = pickle.loads(pickle.dumps(mem_buff))
+    try:
+        extend(attached, 1, np.ones(3, dtype=np.float32))
+        assert len(mem_buff) == 3
+    finally:
+        attached.close()
+
+
+def test_shared_weights_read():
+    state_dict = {'weight': np.arange(6, dtype=np.float32).reshape(2, 3),
+                  'bias': np.ones(2, dtype=np.float32)}
+    weights = SharedWeights({key: array.shape for key, array in state_dict.items()})
+    try:
+        assert weights.read() is None  # Nothing published.
+
+        weights.publish(state_dict)
+        version, read_state_dict = weights.read()
+        for key, array in state_dict.items():
+            np.testing.assert_array_equal(read_state_dict[key], array)
+        assert weights.read(version) is None  # The version the reader already has.
+
+        # The read weights are a copy.
+        read_state_dict['weight'][:] = -1.
+        np.testing.assert_array_equal(weights.read()[1]['weight'], state_dict['weight'])
+
+        # Weights being published (odd version) are not read.
+        weights.version[0] += 1
+        assert weights.read(version) is None
+        weights.version[0] += 1
+        assert weights.read(version)[0] == version + 2
+    finally:
+        weights.close()
+
+
+@pytest.mark.parametrize('start_method', ['fork', 'spawn'])
+def test_actor_learner_run(start_method, tmp_path):
+    metrics_path = tmp_path / 'metrics.jsonl'
+    code = (f"import multiprocessing as mp\n"
+            f"mp.set_start_method({start_method!r})\n"
+            f"from AI_Types.AI_DQL_actor_learner import train_qnet_actor_learner\n"
+            f"train_qnet_actor_learner((800, 600), num_actors=2, envs_per_actor=4, "
+            f"num_episodes=5, seed=0, print_learning_curve=False, "
+            f"metrics_path={str(metrics_path)!r})\n")
+    subprocess.run([sys.executable, '-c', code], cwd=SRC_DIR, capture_output=True, check=True,
+                   timeout=300)
+
+    with open(metrics_path) as f:
+        records = [json.loads(line) for line in f]
+    assert [record['step'] for record in records] == [1, 2, 3, 4, 5]
@@ -0,0 +1,24 @@
+import numpy as np
+import pytest
+import torch
+from AI_Types.AI import AI
+
+
+@pytest.mark.parametrize('mode', ['script', 'trace'])
+def test_compiled_forward_keeps_the_actions(mode):
+    torch.manual_seed(0)
+    ai = AI(2, 3)
+    states = np.random.default_rng(0).random((64, 2), dtype=np.float32)
+    batch_actions = ai.predict_batch(states)
+    actions = [ai.predict(state) for state in states]
+
+    ai.compile_forward(mode)
+
+    np.testing.assert_array_equal(ai.predict_batch(states), batch_actions)
+    assert [ai.predict(state) for state in states] == actions
+    np.testing.assert_array_equal(batch_actions, actions)
+
+
+def test_unknown_compile_mode():
+    with pytest.raises(ValueError):
+        AI(2, 3).compile_forward('jit')
@@ -0,0 +1,16 @@
+import pytest
+from games.ball_game.ball_game import BallGame
+
+
+def test_recorded_states_are_the_agent_states():
+    game = BallGame((800, 600), collect_data=True, headless=True)
+    game.reset_game(save_fitness=False)
+
+    states = []
+    for action in (0, 1, 2, 1):
+        states.append(game.get_state("Ball Game"))
+        game.make_action("Ball Game", action)
+
+    infos, actions = game.get_data()
+    assert infos == [tuple(pytest.approx(value) for value in state) for state in states]
+    assert actions == [0, 1, 2, 1]
@@ -0,0 +1,37 @@
+import os
+import numpy as np
+import pytest
+from conftest import SRC_DIR
+from AI_Types.checkpoint import CHECKPOINT_EXTENSION, convert_pickle, load_checkpoint, \
+    load_pickle
+
+SAVED_AIS_DIR = os.path.join(os.path.dirname(SRC_DIR), 'Saved AIs')
+SAVED_AIS = sorted(name[:-len('.pickle')] for name in os.listdir(SAVED_AIS_DIR)
+                   if name.endswith('.pickle'))
+
+
+@pytest.mark.parametrize('name', SAVED_AIS)
+def test_saved_ais_convert(name, tmp_path):
+    pickle_path = os.path.join(SAVED_AIS_DIR, name + '.pickle')
+    path = str(tmp_path / (name + CHECKPOINT_EXTENSION))
+    convert_pickle(pickle_path, path)
+
+    legacy_ai = load_pickle(pickle_path)
+    ai = load_checkpoint(path, numpy_only=True)
+    states = np.array([[.3, .6], [.7, .1]], dtype=np.float32)
+    if hasattr(legacy_ai, 'activate'):
+        for state in states:
+            assert ai.activate(state) == legacy_ai.activate(state)
+        return
+
+    # The AIs of earlier versions do not run with the current `AI`, their linear layers are
+    # applied by hand (with ReLUs in between).
+    state_dict = {key: tensor.numpy() for key, tensor in legacy_ai.state_dict().items()}
+    layers = [name for name, module in legacy_ai.named_children()]
+    outputs = states
+    for layer in layers:
+        outputs = outputs @ state_dict[layer + '.weight'].T + state_dict[layer + '.bias']
+        if layer != layers[-1]:
+            outputs = np.maximum(outputs, 0.)
+
+    np.testing.assert_allclose(ai.forward(states), outputs, rtol=1e-5, atol=1e-6)
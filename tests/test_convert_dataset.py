@@ -0,0 +1,20 @@
+import os
+import pickle
+import numpy as np
+from conftest import SRC_DIR
+from game_learn import S_WIDTH, main
+from gameplay_dataset import load_gameplay
+
+DATASETS_DIR = os.path.join(os.path.dirname(SRC_DIR), 'datasets')
+
+
+def test_legacy_datasets_are_normalized(tmp_path):
+    with open(os.path.join(DATASETS_DIR, 'DS1.pickle'), 'rb') as f:
+        legacy_infos, legacy_actions = pickle.load(f)
+
+    main(['convert', os.path.join(DATASETS_DIR, 'DS1'), str(tmp_path / 'DS1')])
+    infos, actions = load_gameplay(str(tmp_path / 'DS1'))
+
+    np.testing.assert_allclose(infos, np.asarray(legacy_infos) / S_WIDTH, rtol=1e-6)
+    np.testing.assert_array_equal(actions, legacy_actions)
+    assert 0. <= infos.min() and infos.max() <= 1.
@@ -0,0 +1,45 @@
+import torch
+from AI_Types.AI_DQL import evaluate_targets
+from AI_Types.replay_buffer import Batch
+
+GAMMA = 0.9
+
+
+class StubTargetNet:
+    """
+    Target network whose Q-values are given for every next state.
+    """
+
+    def __init__(self, q_values: torch.Tensor):
+        self.q_values = q_values
+
+    def __call__(self, next_states: torch.Tensor):
+        assert len(next_states) == len(self.q_values)
+        return self.q_values
+
+
+def make_sample(rewards: list[float], dones: list[float]):
+    num_transitions = len(rewards)
+    return Batch(states=torch.zeros(num_transitions, 2),
+                 actions=torch.zeros(num_transitions, dtype=torch.int64),
+                 rewards=torch.tensor(rewards), next_states=torch.zeros(num_transitions, 2),
+                 dones=torch.tensor(dones), weights=None, indices=None)
+
+
+def test_targets():
+    q_net_target = StubTargetNet(torch.tensor([[1., 4., -2.], [3., -1., 0.5], [-5., -3., -4.]]))
+    sample = make_sample(rewards=[1., -1., 0.5], dones=[0., 1., 0.])
+
+    targets = evaluate_targets(q_net_target, sample, gamma=GAMMA)
+
+    # Non-terminal transitions bootstrap from the best next Q-value, a terminal one does not.
+    torch.testing.assert_close(targets, torch.tensor([1. + GAMMA * 4., -1., 0.5 + GAMMA * -3.]))
+
+
+def test_terminal_targets_are_the_rewards():
+    q_net_target = StubTargetNet(torch.full((4, 3), 100.))
+    sample = make_sample(rewards=[1., -1., 0., 2.5], dones=[1., 1., 1., 1.])
+
+    targets = evaluate_targets(q_net_target, sample, gamma=GAMMA)
+
+    torch.testing.assert_close(targets, sample.rewards)
@@ -0,0 +1,49 @@
+import random
+import neat
+from conftest import write_neat_config
+from AI_Types.AI_evolution import BatchedEvaluator, ParallelEvaluator
+
+NUM_GENOMES = 12
+
+
+def make_genomes(config_name: str, tmp_path):
+    """
+    :return: A small population of the given NEAT configuration and the configuration.
+    """
+    config_path = write_neat_config(config_name, tmp_path, NUM_GENOMES)
+
+    random.seed(0)
+    config = neat.Config(neat.DefaultGenome, neat.DefaultReproduction, neat.DefaultSpeciesSet,
+                         neat.DefaultStagnation, config_path)
+    population = neat.Population(config)
+
+    return list(population.population.items()), config
+
+
+def parallel_fitnesses(genomes, config, num_workers: int, game_class, game_kwargs: dict):
+    evaluator = ParallelEvaluator(num_workers, game_class, game_kwargs, seed=0)
+    try:
+        evaluator.evaluate(genomes, config)
+    finally:
+        evaluator.close()
+
+    return [genome.fitness for genome_id, genome in genomes]
+
+
+def test_flappy_bird_fitnesses_do_not_depend_on_the_workers(tmp_path):
+    from flappy_bird import FlappyBird
+
+    genomes, config = make_genomes('flappy_bird_neat_configs.txt', tmp_path)
+    game_kwargs = {'render': False, 'seed': 0}
+
+    assert parallel_fitnesses(genomes, config, 1, FlappyBird, game_kwargs) == \
+        parallel_fitnesses(genomes, config, 3, FlappyBird, game_kwargs)
+
+
+def test_vector_fitnesses_do_not_depend_on_the_sharding(tmp_path):
+    from games.ball_game.vector_ball_game import VectorBallGame
+
+    genomes, config = make_genomes('neat_configs.txt', tmp_path)
+    single_shard = BatchedEvaluator(VectorBallGame, seed=0).get_fitnesses(genomes, config, 0)
+
+    assert single_shard == parallel_fitnesses(genomes, config, 3, VectorBallGame, {})
@@ -0,0 +1,30 @@
+import os
+from conftest import write_neat_config
+from AI_Types.AI_evolution import train_neat, restore_population
+from AI_Types.checkpoint import CHECKPOINT_EXTENSION, load_checkpoint
+from games.ball_game.vector_ball_game import VectorBallGame
+
+
+def test_resume_past_the_last_generation(tmp_path):
+    config_path = write_neat_config('neat_configs.txt', tmp_path, 8)
+    checkpoint_path = str(tmp_path / 'neat.snapshot')
+    path_for_ai = str(tmp_path / 'best')
+
+    train_neat(config_path, VectorBallGame, num_generations=2, path_for_ai=path_for_ai, seed=0,
+               checkpoint_path=checkpoint_path, checkpoint_every=1)
+    p = restore_population(checkpoint_path)
+    assert p.generation == 2
+    assert p.best_genome is not None
+
+    # No generations are left, the best genome of the snapshot is saved.
+    os.remove(path_for_ai + CHECKPOINT_EXTENSION)
+    train_neat(config_path, VectorBallGame, num_generations=1, path_for_ai=path_for_ai, seed=0,
+               checkpoint_path=checkpoint_path, checkpoint_every=1)
+    assert load_checkpoint(path_for_ai + CHECKPOINT_EXTENSION) is not None
+
+    # The generations left are run.
+    train_neat(config_path, VectorBallGame, num_generations=3, seed=0,
+               checkpoint_path=checkpoint_path, checkpoint_every=1)
+    p = restore_population(checkpoint_path)
+    assert p.generation == 3
+    assert p.best_genome is not None
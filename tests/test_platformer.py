@@ -0,0 +1,39 @@
+import random
+import pygame
+from games.platformer_game.platformer_game import Platformer, PlatformStack, SCREEN_SIZE, \
+    PLATFORM_HEIGHT
+
+
+def test_headless_game_never_touches_pygame(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("A headless game used pygame.")
+
+    for module, name in ((pygame, 'init'), (pygame.display, 'set_mode'),
+                         (pygame.key, 'get_pressed'), (pygame.event, 'get')):
+        monkeypatch.setattr(module, name, fail)
+
+    game = Platformer(headless=True)
+    for _ in range(1000):
+        game.step()
+        if game.player.rect.top > SCREEN_SIZE[1]:
+            game.reset_game()
+
+
+def test_platform_stack_finds_the_colliding_platforms():
+    rng = random.Random(0)
+    stack = PlatformStack()
+    for _ in range(30):
+        stack.add(rng.randrange(0, 700), rng.randrange(-200, 600), rng.randrange(20, 100))
+
+    for _ in range(200):
+        stack.scroll_down(rng.randrange(0, 5))
+        stack.drop_below(SCREEN_SIZE[1])
+        if rng.random() < .2:
+            stack.add(rng.randrange(0, 700), rng.randrange(-200, 0), 100)
+
+        rect = pygame.Rect(rng.randrange(0, 750), rng.randrange(-100, 600), 50, 50)
+        expected = sorted(platform.top for platform in stack.screen_rects()
+                          if platform.colliderect(rect))
+        assert sorted(stack.colliding_tops(rect)) == expected
+        assert all(platform.top <= SCREEN_SIZE[1] and platform.height == PLATFORM_HEIGHT
+                   for platform in stack.screen_rects())
@@ -0,0 +1,43 @@
+import sys
+import json
+import time
+import subprocess
+import pytest
+from conftest import SRC_DIR
+from benchmarks import BENCHMARKS
+
+# Modules that importing game_learn and parsing a command must not import.
+HEAVY_MODULES = ('torch', 'neat', 'pygame')
+
+
+def run_fresh(code: str):
+    """
+    Run `code` in a fresh Python process from the src directory.
+
+    :return: The wall time of the process and its last line of output.
+    """
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', code], cwd=SRC_DIR, capture_output=True,
+                            text=True, check=True)
+
+    return time.perf_counter() - start, result.stdout.splitlines()[-1]
+
+
+def test_import_is_within_budget():
+    budget = BENCHMARKS['cli.import'][3]
+
+    # The best of a few runs, like the benchmark.
+    seconds = min(run_fresh("import game_learn\nprint()")[0] for _ in range(3))
+
+    assert seconds <= budget
+
+
+@pytest.mark.parametrize('argv', [['plot', 'metrics.jsonl'], ['convert', 'DS1', 'DS1'],
+                                  ['convert_ai', 'AI1', 'AI1'], ['play'], ['ai', 'AI1']])
+def test_parsing_imports_no_heavy_module(argv):
+    code = (f"import sys, json\n"
+            f"import game_learn\n"
+            f"game_learn.make_parser().parse_args({argv!r})\n"
+            f"print(json.dumps([name for name in {HEAVY_MODULES!r} if name in sys.modules]))")
+
+    assert json.loads(run_fresh(code)[1]) == []
@@ -0,0 +1,13 @@
+import numpy as np
+import pytest
+from AI_Types.AI import AI
+from AI_Types.AI_supervised import fit, load_dataset
+
+
+def test_fit_rejects_an_empty_dataset(tmp_path):
+    train_loader = load_dataset(np.empty((0, 2), dtype=np.float32), np.empty(0, dtype=np.uint8))
+    checkpoint_path = tmp_path / 'fit.snapshot'
+
+    with pytest.raises(ValueError, match="empty"):
+        fit(AI(2, 3), train_loader, 2048, checkpoint_path=str(checkpoint_path))
+    assert not checkpoint_path.exists()
@@ -0,0 +1,24 @@
+import pytest
+from games.vector_env import VectorEnv
+from games.ball_game.vector_ball_game import VectorBallGame
+from games.flappy_bird.vector_flappy_bird import VectorFlappyBird
+from games.platformer_game.vector_platformer import VectorPlatformer
+
+
+def test_vector_env_is_abstract():
+    with pytest.raises(TypeError):
+        VectorEnv(2)
+
+    class IncompleteEnv(VectorEnv):
+        def reset_envs(self, mask):
+            pass
+
+    with pytest.raises(TypeError):
+        IncompleteEnv(2)
+
+
+@pytest.mark.parametrize('env_class', [VectorBallGame, VectorFlappyBird, VectorPlatformer])
+def test_games_implement_vector_env(env_class):
+    env = env_class(3, seed=0)
+
+    assert env.reset().shape == (3, env_class.STATE_FEATURES)